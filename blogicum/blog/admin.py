@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Post, Category, Location
+from .models import Post, Category, Location, ImageJob
 
 
 @admin.register(Post)
@@ -20,3 +20,10 @@ class CategoryAdmin(admin.ModelAdmin):
 class LocationAdmin(admin.ModelAdmin):
     list_display = ('name', 'is_published', 'created_at')
     list_filter = ('is_published',)
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ('image', 'post', 'status', 'attempts', 'run_after',
+                    'updated_at')
+    list_filter = ('status',)
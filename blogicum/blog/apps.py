@@ -5,3 +5,16 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from django.conf import settings
+        from PIL import Image
+
+        # Pillow отказывается открывать изображения больше удвоенного
+        # MAX_IMAGE_PIXELS ещё до декодирования.
+        Image.MAX_IMAGE_PIXELS = settings.BLOG_IMAGE_MAX_PIXELS
+
+        if settings.BLOG_TEMPLATE_WARMUP:
+            from .warmup import warm_templates
+
+            warm_templates()
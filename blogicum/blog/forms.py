@@ -1,11 +1,82 @@
 from django import forms
-from .models import Post, Comment, User
+from .models import ChunkedUpload, Post, Comment, User
+from .uploads import AssembledUpload, check_image_upload, downscale_upload
+
+
+class PostImageField(forms.ImageField):
+    def to_python(self, data):
+        if data not in self.empty_values:
+            # До полной проверки Pillow: размер файла и число пикселей
+            # по заголовку.
+            check_image_upload(data)
+        return super().to_python(data)
 
 
 class PostForm(forms.ModelForm):
+    def __init__(self, *args, rejected_uploads=(), user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rejected_uploads = rejected_uploads
+        self.user = user
+        self.chunked_upload = None
+        self.assembled_upload = None
+
     class Meta:
         model = Post
-        fields = ['title', 'text', 'category', 'location', 'image']
+        fields = ['title', 'text', 'pub_date', 'location', 'category',
+                  'image']
+        field_classes = {'image': PostImageField}
+
+    def clean_image(self):
+        if 'image' in self.rejected_uploads:
+            raise forms.ValidationError(
+                'Файл слишком большой и не был принят.',
+                code='file_too_large')
+        image = self.cleaned_data['image']
+        if image and image is not self.initial.get('image'):
+            return downscale_upload(image)
+        return image
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Токен докачанного файла передаётся скриптом страницы рядом с полями
+        # формы; отдельным полем он не объявлен, чтобы не менять её состав.
+        token = self.data.get('upload_token')
+        if not token or 'image' in self.changed_data:
+            return cleaned_data
+        try:
+            upload = ChunkedUpload.objects.filter(
+                token=token, user=self.user).first()
+        except forms.ValidationError:
+            upload = None
+        if upload is None or not upload.is_complete:
+            self.add_error('image', 'Загрузка не найдена или не завершена.')
+            return cleaned_data
+        assembled = AssembledUpload(upload)
+        try:
+            image = self.fields['image'].clean(
+                assembled, self.initial.get('image'))
+        except forms.ValidationError as error:
+            assembled.close()
+            self.add_error('image', error)
+            return cleaned_data
+        cleaned_data['image'] = downscale_upload(image)
+        self.chunked_upload = upload
+        # downscale_upload может вернуть другой файл: собранный всё равно
+        # нужно закрыть.
+        self.assembled_upload = assembled
+        return cleaned_data
+
+    @property
+    def image_changed(self):
+        return 'image' in self.changed_data or bool(self.chunked_upload)
+
+    def discard_chunked_upload(self):
+        """Удаляет собранный файл после того, как его скопировали."""
+        if self.chunked_upload is not None:
+            self.assembled_upload.close()
+            self.assembled_upload = None
+            self.chunked_upload.discard()
+            self.chunked_upload = None
 
 
 class CommentForm(forms.ModelForm):
@@ -0,0 +1,234 @@
+"""Производные размеры и WebP-копии изображений публикаций."""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+
+ORIENTATION_TAG = 0x0112
+# Значения Orientation, при которых ширина и высота меняются местами.
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def variant_name(name, width):
+    root, ext = os.path.splitext(name)
+    return f'{root}_{width}w{ext}'
+
+
+def webp_name(name):
+    return f'{os.path.splitext(name)[0]}.webp'
+
+
+def _encode(image, image_format, quality=None):
+    buffer = BytesIO()
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    image.save(buffer, format=image_format, optimize=True,
+               quality=quality or settings.BLOG_IMAGE_QUALITY)
+    return buffer.getvalue()
+
+
+def upright(image):
+    """Поворачивает растр по тегу EXIF Orientation.
+
+    _encode не переносит EXIF в новые файлы, поэтому без поворота
+    снимки с телефона в производных копиях лежали бы на боку.
+    """
+    return ImageOps.exif_transpose(image)
+
+
+def _replace(storage, name, content):
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(content))
+
+
+def _read(storage, name):
+    with storage.open(name) as source:
+        return source.read()
+
+
+def displayed_size(image):
+    """Размеры с учётом EXIF Orientation, без декодирования пикселей."""
+    width, height = image.size
+    if image.getexif().get(ORIENTATION_TAG) in ROTATED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def probe_image(file):
+    """Возвращает (формат, ширина, высота), читая только заголовок."""
+    position = file.tell()
+    try:
+        with Image.open(file) as image:
+            return (image.format, *displayed_size(image))
+    finally:
+        file.seek(position)
+
+
+def image_dimensions(storage, name):
+    with storage.open(name) as source:
+        _, width, height = probe_image(source)
+    return {'width': width, 'height': height}
+
+
+def dominant_color(data):
+    """Средний цвет изображения для заглушки до загрузки картинки."""
+    with Image.open(BytesIO(data)) as image:
+        image.draft('RGB', (64, 64))
+        red, green, blue = image.convert('RGB').resize(
+            (1, 1), Image.BOX).getpixel((0, 0))
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def render_variants(name, data):
+    """Кодирует уменьшенные копии изображения.
+
+    Возвращает словарь {ширина: (имя файла, байты)}; ничего не сохраняет.
+    """
+    original = Image.open(BytesIO(data))
+    image_format = original.format
+    original = upright(original)
+    variants = {}
+    for width in settings.BLOG_IMAGE_VARIANT_WIDTHS:
+        if width >= original.width:
+            continue
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.LANCZOS)
+        variants[str(width)] = (
+            variant_name(name, width), _encode(resized, image_format))
+    return variants
+
+
+def render_webp(sources):
+    """Кодирует файлы {ключ: (имя, байты)} в WebP.
+
+    Возвращает словарь {ключ: (имя, байты)} и число сэкономленных байт.
+    Копия, которая не меньше исходного файла, отбрасывается.
+    """
+    webp = {}
+    saved = 0
+    for key, (name, data) in sources.items():
+        image = Image.open(BytesIO(data))
+        if image.format == 'WEBP':
+            # Оригинал уже в WebP: отдельная копия не нужна.
+            return {}, 0
+        encoded = _encode(
+            upright(image), 'WEBP', settings.BLOG_WEBP_QUALITY)
+        if len(encoded) >= len(data):
+            continue
+        webp[key] = (webp_name(name), encoded)
+        saved += len(data) - len(encoded)
+    return webp, saved
+
+
+def render_image(storage, name):
+    """Готовит все производные файлы name, не сохраняя их.
+
+    Только читает из хранилища, поэтому может выполняться в отдельном
+    процессе; результат передаётся в save_rendered().
+    """
+    data = _read(storage, name)
+    with Image.open(BytesIO(data)) as image:
+        width, height = displayed_size(image)
+    variants = render_variants(name, data)
+    webp, saved = render_webp({'original': (name, data), **variants})
+    return {
+        'width': width, 'height': height, 'color': dominant_color(data),
+        'variants': variants, 'webp': webp, 'webp_bytes_saved': saved,
+    }
+
+
+def _save_all(storage, rendered):
+    return {
+        key: _replace(storage, name, data)
+        for key, (name, data) in rendered.items()
+    }
+
+
+def save_rendered(storage, rendered):
+    """Сохраняет результат render_image() и возвращает image_meta."""
+    return {
+        'width': rendered['width'],
+        'height': rendered['height'],
+        'color': rendered['color'],
+        'variants': _save_all(storage, rendered['variants']),
+        'webp': _save_all(storage, rendered['webp']),
+        'webp_quality': settings.BLOG_WEBP_QUALITY,
+        'webp_bytes_saved': rendered['webp_bytes_saved'],
+    }
+
+
+def build_image_meta(storage, name):
+    return save_rendered(storage, render_image(storage, name))
+
+
+def generate_webp(post):
+    """Дополняет post.image_meta WebP-копиями.
+
+    Повторный вызов с тем же качеством ничего не делает. Возвращает
+    число сэкономленных байт.
+    """
+    meta = post.image_meta
+    if meta.get('webp_quality') == settings.BLOG_WEBP_QUALITY:
+        return 0
+    storage = post.image.storage
+    sources = {'original': post.image.name, **meta.get('variants', {})}
+    webp, saved = render_webp({
+        key: (name, _read(storage, name)) for key, name in sources.items()
+    })
+    webp = _save_all(storage, webp)
+    post.image_meta = {
+        **meta, 'webp': webp, 'webp_quality': settings.BLOG_WEBP_QUALITY,
+        'webp_bytes_saved': saved,
+    }
+    return saved
+
+
+def process_post_image(post):
+    """Пересчитывает производные файлы после загрузки или смены image."""
+    delete_derived(post.image.storage, post.image_meta)
+    post.image_meta = {}
+    if post.image:
+        post.image_meta = build_image_meta(
+            post.image.storage, post.image.name)
+    post.save(update_fields=['image_meta'])
+
+
+def derived_names(meta):
+    return [*meta.get('variants', {}).values(), *meta.get('webp', {}).values()]
+
+
+def delete_derived(storage, meta):
+    for name in derived_names(meta):
+        storage.delete(name)
+
+
+def _srcset(storage, names):
+    return ', '.join(
+        f'{storage.url(name)} {width}w'
+        for width, name in sorted(
+            names.items(), key=lambda item: int(item[0])))
+
+
+def image_srcset(storage, meta):
+    return _srcset(storage, meta.get('variants', {}))
+
+
+def webp_srcset(storage, meta):
+    """Возвращает srcset для <source type="image/webp"> или пустую строку.
+
+    Выбрав <source>, браузер не возвращается к <img> за недостающей
+    шириной, поэтому источник отдаётся, только если WebP-копия есть у
+    каждого размера из variants.
+    """
+    webp = meta.get('webp', {})
+    variants = meta.get('variants', {})
+    if variants:
+        if not all(width in webp for width in variants):
+            return ''
+        return _srcset(storage, {width: webp[width] for width in variants})
+    original = webp.get('original')
+    return storage.url(original) if original else ''
@@ -0,0 +1,83 @@
+"""Окружение Jinja2 для необязательного пути рендеринга (BLOG_JINJA2).
+
+Шаблоны из jinja2/ повторяют DTL-шаблоны ленты, категории, профиля и
+публикации; здесь им даются те же помощники: static, url, фильтр date,
+теги django_bootstrap5 и вывод дат в локальном формате, как у DTL.
+Под тестами (setup_test_environment) бэкенд вдобавок шлёт
+template_rendered, чтобы тестовый клиент видел контекст и шаблоны так
+же, как при DTL.
+"""
+import datetime
+
+from django.template import Context
+from django.template.base import Template as DjangoTemplate
+from django.template.backends import jinja2 as backend
+from django.template.defaultfilters import date
+from django.templatetags.static import static
+from django.test.signals import template_rendered
+from django.test.utils import instrumented_test_render
+from django.urls import reverse
+from django.utils.formats import localize
+from django.utils.timezone import template_localtime
+from django_bootstrap5.templatetags.django_bootstrap5 import (
+    bootstrap_button, bootstrap_form)
+from jinja2 import ChainableUndefined, Environment
+
+from .templatetags.blog_tags import inline_static
+
+
+def url(viewname, *args):
+    return reverse(viewname, args=args)
+
+
+def finalize(value):
+    """Выводит даты так же, как DTL: в текущей зоне и локальном формате."""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return localize(template_localtime(value))
+    return value
+
+
+def environment(**options):
+    # Как в DTL, отсутствующая переменная и её атрибуты дают пустую
+    # строку; бэкенд при DEBUG подставил бы DebugUndefined.
+    options['undefined'] = ChainableUndefined
+    env = Environment(finalize=finalize, **options)
+    env.globals.update(
+        static=static,
+        url=url,
+        inline_static=inline_static,
+        bootstrap_form=bootstrap_form,
+        bootstrap_button=bootstrap_button,
+    )
+    env.filters['date'] = date
+    return env
+
+
+class RenderedContext(Context):
+    """Контекст для template_rendered; как и ContextList, отдаёт keys()."""
+
+    def keys(self):
+        return self.flatten().keys()
+
+
+class Template(backend.Template):
+
+    @property
+    def name(self):
+        return self.origin.template_name
+
+    def render(self, context=None, request=None):
+        context = {} if context is None else context
+        html = super().render(context, request)
+        # Как и DTL, сигнал нужен только тестам: setup_test_environment
+        # подменяет Template._render на instrumented_test_render.
+        if DjangoTemplate._render is instrumented_test_render:
+            template_rendered.send(
+                sender=self, template=self, context=RenderedContext(context))
+        return html
+
+
+class Jinja2(backend.Jinja2):
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
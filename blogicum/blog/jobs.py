@@ -0,0 +1,100 @@
+"""Очередь обработки изображений публикаций вне запроса.
+
+Веб-процесс только ставит задачу в таблицу ImageJob; команда
+run_image_worker забирает задачи и выполняет работу Pillow в пуле
+процессов. Пока задача не выполнена, шаблоны показывают оригинал.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .images import (
+    delete_derived, derived_names, image_dimensions, process_post_image,
+    render_image, save_rendered)
+from .models import ImageJob, Post
+from .storage import release_on_commit
+
+
+def enqueue_image_job(post):
+    """Сбрасывает производные файлы публикации и ставит задачу."""
+    if not settings.BLOG_IMAGE_JOBS:
+        process_post_image(post)
+        return None
+    delete_derived(post.image.storage, post.image_meta)
+    post.image_meta = {}
+    if post.image:
+        # Размеры читаются из заголовка сразу, чтобы шаблоны могли
+        # резервировать место под картинку до окончания обработки.
+        try:
+            post.image_meta = image_dimensions(
+                post.image.storage, post.image.name)
+        except OSError:
+            pass
+    post.save(update_fields=['image_meta'])
+    ImageJob.objects.filter(
+        post=post, status=ImageJob.PENDING).delete()
+    if not post.image:
+        return None
+    return ImageJob.objects.create(post=post, image=post.image.name)
+
+
+def claim_jobs(limit):
+    """Атомарно помечает до limit готовых к запуску задач как RUNNING."""
+    claimed = []
+    candidates = ImageJob.objects.filter(
+        status=ImageJob.PENDING, run_after__lte=timezone.now()
+    ).order_by('run_after', 'id').values_list('id', flat=True)[:limit]
+    for job_id in candidates:
+        if ImageJob.objects.filter(
+                id=job_id, status=ImageJob.PENDING).update(
+                    status=ImageJob.RUNNING, updated_at=timezone.now()):
+            claimed.append(ImageJob.objects.get(id=job_id))
+    return claimed
+
+
+def process_image_file(name):
+    """Выполняется в дочернем процессе пула: только чтение и Pillow."""
+    return render_image(Post.image.field.storage, name)
+
+
+def complete_job(job, rendered):
+    storage = Post.image.field.storage
+    meta = save_rendered(storage, rendered)
+    with transaction.atomic():
+        # Если изображение успели заменить или публикацию удалили,
+        # результат уже не нужен: ссылки на новые файлы освобождаются.
+        if not Post.objects.filter(id=job.post_id, image=job.image).update(
+                image_meta=meta):
+            release_on_commit(storage, derived_names(meta))
+        job.status = ImageJob.DONE
+        job.last_error = ''
+        job.save(update_fields=['status', 'last_error', 'updated_at'])
+
+
+def fail_job(job, error):
+    job.attempts += 1
+    job.last_error = f'{type(error).__name__}: {error}'
+    if job.attempts < settings.BLOG_IMAGE_JOB_MAX_ATTEMPTS:
+        job.status = ImageJob.PENDING
+        job.run_after = timezone.now() + timedelta(
+            seconds=settings.BLOG_IMAGE_JOB_RETRY_DELAY * 2 ** job.attempts)
+    else:
+        job.status = ImageJob.FAILED
+    job.save(update_fields=[
+        'attempts', 'last_error', 'status', 'run_after', 'updated_at'])
+
+
+def touch_jobs(jobs):
+    """Отмечает, что задачи ещё выполняются, чтобы их не сочли зависшими."""
+    ImageJob.objects.filter(id__in=[job.id for job in jobs]).update(
+        updated_at=timezone.now())
+
+
+def requeue_stale_jobs(timeout):
+    """Возвращает в очередь задачи, зависшие после падения воркера."""
+    return ImageJob.objects.filter(
+        status=ImageJob.RUNNING,
+        updated_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(status=ImageJob.PENDING)
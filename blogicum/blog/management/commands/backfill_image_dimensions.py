@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import _read, dominant_color, image_dimensions
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Сохраняет размеры и средний цвет изображений публикаций '
+            'в image_meta пакетами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--no-color', action='store_true',
+            help='Только размеры из заголовка, без декодирования.')
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.exclude(image='').exclude(image=None)
+        last_id = 0
+        updated = failed = 0
+        while True:
+            batch = list(
+                queryset.filter(id__gt=last_id).order_by('id')
+                .only('id', 'image', 'image_meta')[:options['batch_size']])
+            if not batch:
+                break
+            changed = []
+            for post in batch:
+                meta = post.image_meta
+                need_color = not options['no_color'] and 'color' not in meta
+                if 'width' in meta and not need_color:
+                    continue
+                storage, name = post.image.storage, post.image.name
+                try:
+                    meta = {**meta, **image_dimensions(storage, name)}
+                    if need_color:
+                        meta['color'] = dominant_color(_read(storage, name))
+                except (OSError, ValueError) as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+                post.image_meta = meta
+                changed.append(post)
+            Post.objects.bulk_update(changed, ['image_meta'])
+            updated += len(changed)
+            last_id = batch[-1].id
+        self.stdout.write(f'Обновлено: {updated}, ошибок: {failed}')
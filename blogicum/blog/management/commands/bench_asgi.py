@@ -0,0 +1,123 @@
+import http.client
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Одно и то же приложение под одним сервером: отличается только
+# интерфейс, через который uvicorn его вызывает.
+APPLICATIONS = {
+    'wsgi': 'blogicum.wsgi:application',
+    'asgi': 'blogicum.asgi:application',
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность WSGI и ASGI под uvicorn '
+            'на одной машине. Нужен пакет uvicorn; данные берутся из '
+            'текущей базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--paths', nargs='+', default=['/about/', '/rules/'])
+        parser.add_argument(
+            '--interfaces', nargs='+', choices=APPLICATIONS,
+            default=list(APPLICATIONS))
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Секунд нагрузки на каждый интерфейс.')
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec('uvicorn') is None:
+            raise CommandError('Для замера нужен пакет uvicorn.')
+        self.stdout.write(
+            f'{"интерфейс":>10} {"запр/с":>10} {"p50, мс":>9} '
+            f'{"p99, мс":>9} {"ошибки":>7}')
+        for interface in options['interfaces']:
+            server = self.start_server(
+                interface, options['port'], options['workers'])
+            try:
+                self.wait_ready(options['port'])
+                latencies, errors, elapsed = self.load(
+                    options['port'], options['paths'],
+                    options['concurrency'], options['duration'])
+            finally:
+                server.terminate()
+                server.wait()
+            latencies.sort()
+            p50 = statistics.median(latencies) if latencies else 0
+            p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0
+            self.stdout.write(
+                f'{interface:>10} {len(latencies) / elapsed:>10.1f} '
+                f'{p50 * 1000:>9.2f} {p99 * 1000:>9.2f} {errors:>7}')
+
+    @staticmethod
+    def start_server(interface, port, workers):
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'blogicum.settings'))
+        return subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', APPLICATIONS[interface],
+             '--interface', interface if interface == 'wsgi' else 'asgi3',
+             '--port', str(port), '--workers', str(workers),
+             '--log-level', 'warning', '--no-access-log'],
+            cwd=settings.BASE_DIR, env=env)
+
+    @staticmethod
+    def wait_ready(port, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', port), 1).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise CommandError(f'Сервер не поднялся на порту {port}.')
+
+    @staticmethod
+    def load(port, paths, concurrency, duration):
+        deadline = time.monotonic() + duration
+
+        def client(offset):
+            connection = http.client.HTTPConnection('127.0.0.1', port)
+            latencies = []
+            errors = 0
+            index = offset
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', paths[index % len(paths)])
+                    response = connection.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    errors += 1
+                    connection.close()
+                    connection = http.client.HTTPConnection(
+                        '127.0.0.1', port)
+                    continue
+                finally:
+                    index += 1
+                if response.status == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+            connection.close()
+            return latencies, errors
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(client, range(concurrency)))
+        elapsed = time.monotonic() - started
+        latencies = [value for result in results for value in result[0]]
+        return latencies, sum(result[1] for result in results), elapsed
@@ -0,0 +1,79 @@
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.template.loader import get_template
+
+from blog.cards import card_queryset
+from blog.models import Category, Location, Post
+from blog.templatetags.blog_tags import post_card
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает память и время вывода карточек через модели '
+            'и через blog.cards. Тестовые данные откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        with transaction.atomic():
+            self.create_posts(max(sizes))
+            template = get_template('includes/post_card.html')
+            self.stdout.write(
+                f'{"N":>6} {"путь":>8} {"мс":>10} {"пик КБ":>10}')
+            for size in sizes:
+                for name, make_qs in (('models', self.model_qs),
+                                      ('cards', self.card_qs)):
+                    elapsed, peak = self.measure(
+                        template, make_qs, size, options['repeat'])
+                    self.stdout.write(
+                        f'{size:>6} {name:>8} {elapsed * 1000:>10.2f} '
+                        f'{peak / 1024:>10.1f}')
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def create_posts(count):
+        author = get_user_model().objects.create(username='bench_cards')
+        category = Category.objects.create(
+            title='Бенчмарк', description='-', slug='bench-cards')
+        location = Location.objects.create(name='Бенчмарк')
+        Post.objects.bulk_create(
+            Post(title=f'Пост {i}', text='слово ' * 2000,
+                 excerpt=Post.make_excerpt('слово ' * 2000),
+                 author=author, category=category, location=location,
+                 image='posts/bench.jpg')
+            for i in range(count))
+
+    @staticmethod
+    def model_qs():
+        return Post.objects.select_related(
+            'author', 'category', 'location').defer('text').annotate(
+            comment_count=Count('comments')).order_by('-pub_date')
+
+    def card_qs(self):
+        return card_queryset(self.model_qs())
+
+    @staticmethod
+    def measure(template, make_qs, size, repeat):
+        def run():
+            for post in make_qs()[:size]:
+                template.render(post_card(post))
+
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return best, peak
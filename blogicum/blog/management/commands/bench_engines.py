@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count
+from django.template import engines
+from django.test import RequestFactory, override_settings
+
+from blog.management.commands.bench_cards import Command as BenchCards
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время рендеринга ленты в DTL и Jinja2. '
+            'Тестовые данные откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        templates = [settings.JINJA2_TEMPLATES, *settings.TEMPLATES[-1:]]
+        with override_settings(TEMPLATES=templates), transaction.atomic():
+            BenchCards.create_posts(max(sizes))
+            request = RequestFactory().get('/')
+            request.user = AnonymousUser()
+            self.stdout.write(f'{"N":>6} {"движок":>8} {"мс/стр":>10}')
+            for size in sizes:
+                posts = list(Post.objects.select_related(
+                    'author', 'category', 'location').annotate(
+                    comment_count=Count('comments'))[:size])
+                page = Paginator(posts, size).page(1)
+                for alias in ('django', 'jinja2'):
+                    template = engines[alias].get_template('blog/index.html')
+                    elapsed = self.measure(
+                        template, {'page_obj': page}, request,
+                        options['repeat'])
+                    self.stdout.write(
+                        f'{size:>6} {alias:>8} {elapsed * 1000:>10.2f}')
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def measure(template, context, request, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            template.render(dict(context), request)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,57 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from blogicum.media import serve_media
+
+
+class Command(BaseCommand):
+    help = ('Измеряет пропускную способность раздачи медиафайлов '
+            'внутри процесса: целиком, диапазоном, 304 и с X-Accel.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=50)
+
+    def handle(self, *args, **options):
+        size = options['size_mb'] * 2 ** 20
+        name = 'bench/media.bin'
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as target:
+            target.write(os.urandom(size))
+        factory = RequestFactory()
+        etag = serve_media(factory.get('/'), name)['ETag']
+        cases = (
+            ('целиком', {}, None),
+            ('Range 1 МБ', {'HTTP_RANGE': 'bytes=0-1048575'}, None),
+            ('If-None-Match', {'HTTP_IF_NONE_MATCH': etag}, None),
+            ('X-Accel-Redirect', {}, 'x-accel-redirect'),
+        )
+        try:
+            for title, headers, accel in cases:
+                with override_settings(MEDIA_ACCEL=accel):
+                    self.run_case(
+                        title, factory, name, headers, options['requests'])
+        finally:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+
+    def run_case(self, title, factory, name, headers, count):
+        sent = 0
+        started = time.perf_counter()
+        for _ in range(count):
+            response = serve_media(factory.get('/', **headers), name)
+            if response.streaming:
+                for chunk in response.streaming_content:
+                    sent += len(chunk)
+            else:
+                sent += len(response.content)
+            response.close()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{title:>18}: {count / elapsed:8.1f} запр/с, '
+            f'{sent / elapsed / 2 ** 20:8.1f} МБ/с')
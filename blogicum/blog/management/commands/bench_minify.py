@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count
+from django.template.loader import get_template
+from django.test import RequestFactory
+
+from blog.management.commands.bench_cards import Command as BenchCards
+from blog.models import Post
+from blogicum.minify import minify_html
+
+
+class Command(BaseCommand):
+    help = ('Измеряет скорость минификатора HTML на ленте из N карточек. '
+            'Тестовые данные откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        with transaction.atomic():
+            BenchCards.create_posts(max(sizes))
+            request = RequestFactory().get('/')
+            request.user = AnonymousUser()
+            template = get_template('blog/index.html')
+            self.stdout.write(
+                f'{"N":>6} {"КБ":>8} {"размер":>8} {"мс":>8} {"МБ/с":>8}')
+            for size in sizes:
+                posts = list(Post.objects.select_related(
+                    'author', 'category', 'location').annotate(
+                    comment_count=Count('comments'))[:size])
+                page = Paginator(posts, size).page(1)
+                html = template.render({'page_obj': page}, request)
+                elapsed = self.measure(html, options['repeat'])
+                length = len(html.encode())
+                ratio = len(minify_html(html).encode()) / length
+                self.stdout.write(
+                    f'{size:>6} {length / 1024:>8.1f} {ratio:>8.1%} '
+                    f'{elapsed * 1000:>8.2f} '
+                    f'{length / elapsed / 2 ** 20:>8.1f}')
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def measure(html, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            minify_html(html)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
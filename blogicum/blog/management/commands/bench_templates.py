@@ -0,0 +1,64 @@
+import copy
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from blog.warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = ('Меряет время первого запроса на свежем cached.Loader '
+            'с прогревом шаблонов и без него.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paths', nargs='+', default=['/'])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        templates = self.cached_templates()
+        # Первый запрос вообще прогревает URLconf и импорты — не в счёт.
+        self.first_request(templates, options['paths'][0], warm=True)
+        self.stdout.write(
+            f'{"путь":<30} {"холодный мс":>12} {"прогретый мс":>13} '
+            f'{"прогрев мс":>11}')
+        for path in options['paths']:
+            cold = min(
+                self.first_request(templates, path, warm=False)[0]
+                for _ in range(options['repeat']))
+            warm, warmup = min(
+                self.first_request(templates, path, warm=True)
+                for _ in range(options['repeat']))
+            self.stdout.write(
+                f'{path:<30} {cold * 1000:>12.2f} {warm * 1000:>13.2f} '
+                f'{warmup * 1000:>11.2f}')
+
+    @staticmethod
+    def cached_templates():
+        templates = copy.deepcopy(settings.TEMPLATES)
+        for config in templates:
+            if config['BACKEND'] != (
+                    'django.template.backends.django.DjangoTemplates'):
+                continue
+            options = config.setdefault('OPTIONS', {})
+            loaders = options.get('loaders', settings.BLOG_TEMPLATE_LOADERS)
+            if isinstance(loaders[0], str):
+                loaders = [('django.template.loaders.cached.Loader', loaders)]
+            options['loaders'] = loaders
+            config.pop('APP_DIRS', None)
+        return templates
+
+    @staticmethod
+    def first_request(templates, path, warm):
+        # Смена TEMPLATES сбрасывает движки — как в новом воркере.
+        with override_settings(
+                TEMPLATES=templates,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            started = time.perf_counter()
+            if warm:
+                warm_templates()
+            warmup = time.perf_counter() - started
+            started = time.perf_counter()
+            Client().get(path)
+            return time.perf_counter() - started, warmup
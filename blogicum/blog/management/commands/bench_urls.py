@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from blog.links import category_url, post_url, profile_url
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время построения ссылок карточек через reverse() '
+            'и через blog.links на страницу из N карточек.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        cards = range(options['cards'])
+
+        def with_reverse():
+            for i in cards:
+                reverse('blog:post_detail', args=[i])
+                reverse('blog:post_detail', args=[i])
+                reverse('blog:profile', args=[f'user{i}'])
+                reverse('blog:category_posts', args=[f'category-{i}'])
+
+        def with_builders():
+            for i in cards:
+                post_url(i)
+                profile_url(f'user{i}')
+                category_url(f'category-{i}')
+
+        self.stdout.write(f'{"способ":>10} {"мкс/стр":>10}')
+        for name, run in (('reverse', with_reverse),
+                          ('builders', with_builders)):
+            run()
+            best = min(self.measure(run) for _ in range(options['repeat']))
+            self.stdout.write(f'{name:>10} {best * 1e6:>10.1f}')
+
+    @staticmethod
+    def measure(run):
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import generate_webp
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Создаёт WebP-копии изображений публикаций пакетами '
+            'и сообщает, сколько байт сэкономлено.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.exclude(image='').exclude(image=None)
+        last_id = 0
+        converted = failed = saved = 0
+        while True:
+            batch = list(
+                queryset.filter(id__gt=last_id).order_by('id')
+                .only('id', 'image', 'image_meta')[:options['batch_size']])
+            if not batch:
+                break
+            changed = []
+            for post in batch:
+                before = post.image_meta
+                try:
+                    saved += generate_webp(post)
+                except (OSError, ValueError) as error:
+                    failed += 1
+                    self.stderr.write(f'{post.image.name}: {error}')
+                    continue
+                if post.image_meta is not before:
+                    changed.append(post)
+            Post.objects.bulk_update(changed, ['image_meta'])
+            converted += len(changed)
+            last_id = batch[-1].id
+        self.stdout.write(
+            f'Преобразовано: {converted}, ошибок: {failed}, '
+            f'сэкономлено байт: {saved}')
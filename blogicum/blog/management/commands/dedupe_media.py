@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import derived_names
+from blog.models import Post
+from blog.storage import is_hashed_name
+
+
+class Command(BaseCommand):
+    help = ('Переносит изображения публикаций в хранилище с адресацией '
+            'по содержимому, объединяя одинаковые файлы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        storage = Post.image.field.storage
+        self.converted = {}
+        self.storage = storage
+        last_id = 0
+        posts = 0
+        queryset = Post.objects.exclude(image='').exclude(image=None)
+        while True:
+            batch = list(
+                queryset.filter(id__gt=last_id).order_by('id')
+                .only('id', 'image', 'image_meta')[:options['batch_size']])
+            if not batch:
+                break
+            changed = [post for post in batch if self.convert_post(post)]
+            Post.objects.bulk_update(changed, ['image', 'image_meta'])
+            posts += len(changed)
+            last_id = batch[-1].id
+        freed = 0
+        unique = set(self.converted.values())
+        for old_name in self.converted:
+            if storage.exists(old_name):
+                freed += storage.size(old_name)
+                storage.delete_unreferenced(old_name)
+        for new_name in unique:
+            freed -= storage.size(new_name)
+        self.stdout.write(
+            f'Публикаций: {posts}, файлов: {len(self.converted)}, '
+            f'уникальных: {len(unique)}, освобождено байт: {freed}')
+
+    def convert_post(self, post):
+        names = [post.image.name, *derived_names(post.image_meta)]
+        if all(is_hashed_name(name) for name in names):
+            return False
+        post.image.name = self.convert(post.image.name)
+        meta = post.image_meta
+        for key in ('variants', 'webp'):
+            if key in meta:
+                meta[key] = {
+                    size: self.convert(name)
+                    for size, name in meta[key].items()
+                }
+        return True
+
+    def convert(self, name):
+        if is_hashed_name(name):
+            return name
+        if name in self.converted:
+            new_name = self.converted[name]
+            self.storage._add_reference(new_name, self.storage.size(new_name))
+            return new_name
+        with self.storage.open(name) as source:
+            new_name = self.storage.save(name, source)
+        self.converted[name] = new_name
+        return new_name
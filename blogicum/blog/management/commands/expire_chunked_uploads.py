@@ -0,0 +1,74 @@
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    help = ('Удаляет брошенные загрузки по частям: записи и .part-файлы, '
+            'которые не дописывались дольше --max-age секунд.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=int,
+            default=settings.BLOG_CHUNKED_UPLOAD_MAX_AGE)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        deadline = time.time() - options['max_age']
+        expired, reclaimed = self.expire_uploads(deadline, options['max_age'])
+        stray, stray_bytes = self.remove_stray_files(deadline)
+        verb = 'Будет удалено' if self.dry_run else 'Удалено'
+        self.stdout.write(
+            f'{verb} загрузок: {expired + stray}, '
+            f'освобождено байт: {reclaimed + stray_bytes}')
+
+    def expire_uploads(self, deadline, max_age):
+        expired = reclaimed = 0
+        uploads = ChunkedUpload.objects.filter(
+            created_at__lt=timezone.now() - timedelta(seconds=max_age))
+        for upload in uploads.iterator():
+            # Время изменения файла — время последней дописанной части.
+            try:
+                stat = os.stat(upload.path)
+            except FileNotFoundError:
+                mtime = size = 0
+            else:
+                mtime, size = stat.st_mtime, stat.st_size
+            if mtime > deadline:
+                continue
+            expired += 1
+            reclaimed += size
+            if self.dry_run:
+                self.stdout.write(str(upload.token))
+            else:
+                upload.discard()
+        return expired, reclaimed
+
+    def remove_stray_files(self, deadline):
+        """Файлы без записи: процесс упал, не создав или не удалив её."""
+        tokens = {
+            str(token) for token in
+            ChunkedUpload.objects.values_list('token', flat=True)}
+        removed = reclaimed = 0
+        for path in Path(settings.BLOG_CHUNKED_UPLOAD_DIR).glob('*.part'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.stem in tokens or stat.st_mtime > deadline:
+                continue
+            removed += 1
+            reclaimed += stat.st_size
+            if self.dry_run:
+                self.stdout.write(path.name)
+            else:
+                path.unlink(missing_ok=True)
+        return removed, reclaimed
@@ -0,0 +1,89 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.images import derived_names
+from blog.models import Post, StoredFile
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из MEDIA_ROOT файлы изображений, на которые не '
+            'ссылается ни одна публикация.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='posts')
+        parser.add_argument(
+            '--grace', type=int, default=24 * 60 * 60,
+            help='Не трогать файлы моложе этого числа секунд.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        storage = Post.image.field.storage
+        started = timezone.now()
+        referenced = self.referenced_names()
+        deadline = time.time() - options['grace']
+        batch = {}
+        orphans = reclaimed = 0
+        for name, size, mtime in storage.iter_files(options['prefix']):
+            if name in referenced or mtime > deadline:
+                continue
+            if options['dry_run']:
+                orphans += 1
+                reclaimed += size
+                self.stdout.write(name)
+                continue
+            batch[name] = size
+            if len(batch) >= options['batch_size']:
+                deleted = self.delete(storage, batch, started, deadline)
+                orphans += len(deleted)
+                reclaimed += sum(batch[name] for name in deleted)
+                batch = {}
+        if batch:
+            deleted = self.delete(storage, batch, started, deadline)
+            orphans += len(deleted)
+            reclaimed += sum(batch[name] for name in deleted)
+        verb = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(
+            f'{verb} файлов: {orphans}, освобождено байт: {reclaimed}')
+
+    @staticmethod
+    def referenced_names():
+        referenced = set()
+        rows = Post.objects.exclude(image='').exclude(image=None).values_list(
+            'image', 'image_meta').iterator(chunk_size=2000)
+        for image, meta in rows:
+            referenced.add(image)
+            referenced.update(derived_names(meta or {}))
+        return referenced
+
+    @staticmethod
+    def still_orphaned(storage, names, started, deadline):
+        """Перепроверяет пачку перед удалением.
+
+        Список ссылок собран до обхода каталога. За это время файл могли
+        загрузить заново или на него могла сослаться публикация.
+        """
+        live = set(Post.objects.filter(image__in=names).values_list(
+            'image', flat=True))
+        live.update(StoredFile.objects.filter(
+            name__in=names, updated_at__gte=started).values_list(
+            'name', flat=True))
+        orphaned = []
+        for name in names:
+            if name in live or not storage.exists(name):
+                continue
+            if storage.get_modified_time(name).timestamp() > deadline:
+                continue
+            orphaned.append(name)
+        return orphaned
+
+    def delete(self, storage, names, started, deadline):
+        orphaned = self.still_orphaned(storage, names, started, deadline)
+        for name in orphaned:
+            # Мимо подсчёта ссылок: на эти файлы ссылок уже нет.
+            storage.delete_unreferenced(name)
+        StoredFile.objects.filter(
+            name__in=orphaned, updated_at__lt=started).delete()
+        return orphaned
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import process_post_image
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии изображений публикаций пакетами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать копии, даже если они уже есть.')
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.exclude(image='').exclude(image=None)
+        last_id = 0
+        processed = failed = 0
+        while True:
+            batch = list(
+                queryset.filter(id__gt=last_id).order_by('id')
+                .only('id', 'image', 'image_meta')[:options['batch_size']])
+            if not batch:
+                break
+            for post in batch:
+                if post.image_meta.get('variants') and not options['force']:
+                    continue
+                try:
+                    process_post_image(post)
+                except (OSError, ValueError) as error:
+                    failed += 1
+                    self.stderr.write(f'{post.image.name}: {error}')
+                else:
+                    processed += 1
+            last_id = batch[-1].id
+        self.stdout.write(
+            f'Обработано изображений: {processed}, ошибок: {failed}')
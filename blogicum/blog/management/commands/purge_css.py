@@ -0,0 +1,51 @@
+import gzip
+from pathlib import Path
+
+import django_bootstrap5
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.purgecss import content_tokens, critical, purge, template_tags
+
+# Шаблоны того, что видно без прокрутки: шапка и первая карточка ленты.
+CRITICAL_TEMPLATES = (
+    'base.html', 'includes/header.html', 'includes/post_card.html',
+)
+
+
+class Command(BaseCommand):
+    help = ('Урезает bootstrap.min.css под классы из шаблонов и выделяет '
+            'критическую часть для встраивания в base.html.')
+
+    def add_arguments(self, parser):
+        static = settings.BASE_DIR / 'static_dev' / 'css'
+        parser.add_argument(
+            '--source', type=Path, default=static / 'bootstrap.min.css')
+        parser.add_argument(
+            '--output', type=Path, default=static / 'bootstrap.purged.css')
+        parser.add_argument(
+            '--critical-output', type=Path, default=static / 'critical.css')
+
+    def handle(self, *args, **options):
+        css = options['source'].read_text(encoding='utf-8')
+        template_dirs = [settings.TEMPLATES_DIR, settings.BASE_DIR / 'jinja2']
+        tokens = content_tokens(
+            [*template_dirs, Path(django_bootstrap5.__file__).parent])
+        critical_paths = [
+            settings.TEMPLATES_DIR / name for name in CRITICAL_TEMPLATES]
+        purged = purge(css, tokens)
+        inline = critical(
+            purged, content_tokens(critical_paths),
+            template_tags(critical_paths))
+        if '</' in inline:
+            # Содержимое встраивается внутрь <style>.
+            raise CommandError('Критический CSS закрывает тег <style>.')
+
+        options['output'].write_text(purged, encoding='utf-8')
+        options['critical_output'].write_text(inline, encoding='utf-8')
+        self.stdout.write(f'{"файл":<12} {"байт":>9} {"gzip":>8}')
+        for name, data in (('исходный', css), ('урезанный', purged),
+                           ('критический', inline)):
+            raw = data.encode()
+            self.stdout.write(
+                f'{name:<12} {len(raw):>9} {len(gzip.compress(raw)):>8}')
@@ -0,0 +1,42 @@
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import Comment, Post
+from blog.rendering import (
+    BODY_CACHE_TIMEOUT, RENDERER_VERSION, body_cache, render_body)
+
+
+class Command(BaseCommand):
+    help = ('Отрисовывает HTML текстов публикаций и комментариев '
+            'для текущей версии рендерера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        cache = body_cache()
+        if isinstance(cache, (LocMemCache, DummyCache)):
+            # Такой кеш исчезнет вместе с процессом команды.
+            raise CommandError(
+                'Кеш BLOG_BODY_CACHE не общий для процессов: '
+                'отрисованный HTML пропадёт после выхода команды.')
+        batch_size = options['batch_size']
+        for model in (Post, Comment):
+            total = 0
+            last_id = 0
+            while True:
+                batch = list(
+                    model.objects.filter(id__gt=last_id).order_by('id')
+                    .only('id', 'text')[:batch_size])
+                if not batch:
+                    break
+                cache.set_many({
+                    obj._body_cache_key(): render_body(obj.text)
+                    for obj in batch
+                }, BODY_CACHE_TIMEOUT)
+                total += len(batch)
+                last_id = batch[-1].id
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {total} '
+                f'(версия рендерера {RENDERER_VERSION})')
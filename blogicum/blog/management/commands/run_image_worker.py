@@ -0,0 +1,109 @@
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait)
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from blog.jobs import (
+    claim_jobs, complete_job, fail_job, process_image_file,
+    requeue_stale_jobs, touch_jobs)
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает очередь изображений публикаций в пуле процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.BLOG_IMAGE_WORKERS,
+            help='Число процессов; 0 — выполнять в потоке этого процесса.')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выйти, когда очередь опустеет.')
+
+    def handle(self, *args, **options):
+        self.workers = options['workers']
+        self.executor = self.make_executor()
+        self.running = {}
+        self.done = self.failed = 0
+        slots = max(self.workers, 1)
+        next_requeue = 0
+        try:
+            while True:
+                close_old_connections()
+                if time.monotonic() >= next_requeue:
+                    self.requeue_stale()
+                    next_requeue = (
+                        time.monotonic() + settings.BLOG_IMAGE_JOB_TIMEOUT / 2)
+                self.submit(claim_jobs(slots - len(self.running)))
+                if not self.running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                finished, _ = wait(
+                    self.running, timeout=options['poll_interval'],
+                    return_when=FIRST_COMPLETED)
+                self.collect(finished)
+        finally:
+            self.executor.shutdown()
+        self.stdout.write(
+            f'Выполнено задач: {self.done}, ошибок: {self.failed}')
+
+    def make_executor(self):
+        if self.workers:
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=1)
+
+    def requeue_stale(self):
+        # Свои долгие задачи сначала продлеваются, иначе их забрал бы
+        # другой воркер; в очередь возвращаются только задачи упавших.
+        touch_jobs(self.running.values())
+        requeue_stale_jobs(settings.BLOG_IMAGE_JOB_TIMEOUT)
+
+    def submit(self, jobs):
+        for job in jobs:
+            try:
+                future = self.executor.submit(process_image_file, job.image)
+            except BrokenProcessPool as error:
+                self.fail(job, error)
+                self.rebuild_executor(error)
+            else:
+                self.running[future] = job
+
+    def collect(self, finished):
+        broken = None
+        for future in finished:
+            job = self.running.pop(future)
+            try:
+                rendered = future.result()
+            except BrokenProcessPool as error:
+                broken = error
+                self.fail(job, error)
+            except Exception as error:
+                self.fail(job, error)
+            else:
+                complete_job(job, rendered)
+                self.done += 1
+        if broken is not None:
+            self.rebuild_executor(broken)
+
+    def rebuild_executor(self, error):
+        """Заменяет пул, в котором упал дочерний процесс.
+
+        Сломанный пул завершает с ошибкой все свои задачи, поэтому они
+        возвращаются в очередь сразу, не дожидаясь BLOG_IMAGE_JOB_TIMEOUT.
+        """
+        for job in self.running.values():
+            self.fail(job, error)
+        self.running.clear()
+        self.executor.shutdown(wait=False)
+        self.executor = self.make_executor()
+
+    def fail(self, job, error):
+        fail_job(job, error)
+        self.failed += 1
+        self.stderr.write(f'{job.image}: {error}')
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Сводит журнал BLOG_TEMPLATE_PROFILE_LOG: время представлений '
+            'и шаблонов (cumulative и self), по убыванию self.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log', default=settings.BLOG_TEMPLATE_PROFILE_LOG)
+        parser.add_argument('--view', help='Только это представление.')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Очистить журнал после отчёта.')
+
+    def handle(self, *args, **options):
+        log = Path(options['log'])
+        if not log.exists():
+            raise CommandError(f'Журнал {log} не найден.')
+        views, templates = self.aggregate(log, options['view'])
+
+        self.stdout.write(
+            f'{"представление":<40} {"запросов":>9} {"мс/запрос":>10}')
+        for view, (count, total) in sorted(
+                views.items(), key=lambda item: item[1][1], reverse=True):
+            self.stdout.write(
+                f'{view:<40} {count:>9} {total / count * 1000:>10.2f}')
+
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"шаблон":<40} {"вызовов":>9} {"cum, мс":>10} '
+            f'{"self, мс":>10} {"self/вызов":>10}')
+        ranked = sorted(
+            templates.items(), key=lambda item: item[1][2], reverse=True)
+        for name, (count, cumulative, self_time) in ranked[:options['limit']]:
+            self.stdout.write(
+                f'{name:<40} {count:>9} {cumulative * 1000:>10.2f} '
+                f'{self_time * 1000:>10.2f} '
+                f'{self_time / count * 1000:>10.3f}')
+
+        if options['clear']:
+            log.write_text('')
+
+    @staticmethod
+    def aggregate(log, only_view=None):
+        views = {}
+        templates = {}
+        with log.open(encoding='utf-8') as lines:
+            for line in lines:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if only_view and record['view'] != only_view:
+                    continue
+                view = views.setdefault(record['view'], [0, 0.0])
+                view[0] += 1
+                view[1] += record['duration']
+                for name, stats in record['templates'].items():
+                    total = templates.setdefault(name, [0, 0.0, 0.0])
+                    for index, value in enumerate(stats):
+                        total[index] += value
+        return views, templates
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:06
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_auto_20241207_1944'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'verbose_name': 'комментарий', 'verbose_name_plural': 'комментарии'},
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, help_text='Заполняется автоматически из текста публикации.', verbose_name='Анонс'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='pub_date',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Если установить дату и время в будущем— можно делать отложенные публикации.', verbose_name='Дата и время публикации'),
+        ),
+    ]
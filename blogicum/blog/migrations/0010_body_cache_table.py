@@ -0,0 +1,23 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_body_cache_table(apps, schema_editor):
+    # Таблицы DatabaseCache (в том числе BLOG_BODY_CACHE) создаёт
+    # createcachetable, а не migrate. Без них первое же сохранение поста
+    # падало бы с «no such table». Готовые таблицы команда пропускает.
+    call_command(
+        'createcachetable', database=schema_editor.connection.alias,
+        verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_storedfile_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_body_cache_table, migrations.RunPython.noop),
+    ]
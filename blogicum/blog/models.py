@@ -1,8 +1,23 @@
+import os
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.utils.text import Truncator
+
+from .images import derived_names, image_srcset, webp_srcset
+from .links import category_url, post_url
+from .rendering import RenderedBodyMixin
+from .storage import get_post_image_storage, release_on_commit
+
 User = get_user_model()
 
+EXCERPT_WORDS = 10
+
 
 class BaseModel(models.Model):
     is_published = models.BooleanField(
@@ -30,6 +45,9 @@ class Category(BaseModel):
     def __str__(self):
         return self.title
 
+    def get_absolute_url(self):
+        return category_url(self.slug)
+
 
 class Location(BaseModel):
     name = models.CharField(max_length=256, verbose_name="Название места")
@@ -42,7 +60,7 @@ class Location(BaseModel):
         return self.name
 
 
-class Post(BaseModel):
+class Post(RenderedBodyMixin, BaseModel):
     title = models.CharField(max_length=256, verbose_name="Заголовок")
     text = models.TextField(verbose_name="Текст")
     pub_date = models.DateTimeField(
@@ -64,8 +82,14 @@ class Post(BaseModel):
         verbose_name="Категория", related_name="posts"
     )
     image = models.ImageField(
-        upload_to='posts/',
+        upload_to='posts/', storage=get_post_image_storage,
         null=True, blank=True, verbose_name="Изображение")
+    image_meta = models.JSONField(
+        default=dict, blank=True, editable=False,
+        verbose_name="Сведения об изображении")
+    excerpt = models.TextField(
+        blank=True, editable=False, verbose_name="Анонс",
+        help_text="Заполняется автоматически из текста публикации.")
 
     class Meta:
         verbose_name = "публикация"
@@ -74,8 +98,56 @@ class Post(BaseModel):
     def __str__(self):
         return self.title
 
+    def get_absolute_url(self):
+        return post_url(self.pk)
+
+    @staticmethod
+    def make_excerpt(text):
+        return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+    @property
+    def image_srcset(self):
+        return image_srcset(self.image.storage, self.image_meta)
+
+    @property
+    def image_webp_srcset(self):
+        return webp_srcset(self.image.storage, self.image_meta)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # Частичное сохранение без text не трогает анонс: иначе
+        # отложенный (.defer/.only) текст подгрузился бы отдельным запросом.
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = self.make_excerpt(self.text)
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+        if update_fields is None or 'image' in update_fields:
+            self._release_replaced_image()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_image = instance.__dict__.get('image')
+        return instance
+
+    def _release_replaced_image(self):
+        # Заменённый или очищенный файл больше не нужен этой публикации;
+        # его производные копии освобождает enqueue_image_job().
+        previous = getattr(self, '_saved_image', None)
+        self._saved_image = self.image.name
+        if previous and previous != self.image.name:
+            release_on_commit(self.image.storage, [previous])
+
 
-class Comment(models.Model):
+@receiver(post_delete, sender=Post)
+def release_post_files(sender, instance, **kwargs):
+    """Освобождает ссылки удалённой публикации на файлы изображения."""
+    release_on_commit(instance.image.storage, [
+        instance.image.name, *derived_names(instance.image_meta)])
+
+
+class Comment(RenderedBodyMixin, models.Model):
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -88,3 +160,97 @@ class Comment(models.Model):
 
     def __str__(self):
         return f"Комментарий автора {self.author}"
+
+
+class StoredFile(models.Model):
+    name = models.CharField(max_length=256, unique=True, verbose_name="Файл")
+    size = models.BigIntegerField(verbose_name="Размер")
+    refcount = models.PositiveIntegerField(
+        default=0, verbose_name="Число ссылок")
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name="Добавлено")
+    # Время последнего изменения числа ссылок: gc_media не трогает файлы,
+    # на которые сослались во время обхода.
+    updated_at = models.DateTimeField(
+        default=timezone.now, db_index=True, verbose_name="Изменено")
+
+    class Meta:
+        verbose_name = "файл"
+        verbose_name_plural = "Файлы"
+
+    def __str__(self):
+        return self.name
+
+
+class ImageJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name='image_jobs',
+        verbose_name="Публикация")
+    image = models.CharField(max_length=256, verbose_name="Файл")
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=PENDING,
+        db_index=True, verbose_name="Статус")
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Попыток")
+    last_error = models.TextField(blank=True, verbose_name="Ошибка")
+    run_after = models.DateTimeField(
+        default=timezone.now, verbose_name="Не раньше")
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name="Добавлено")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменено")
+
+    class Meta:
+        verbose_name = "обработка изображения"
+        verbose_name_plural = "Обработка изображений"
+
+    def __str__(self):
+        return f"{self.image} ({self.get_status_display()})"
+
+
+class ChunkedUpload(models.Model):
+    token = models.UUIDField(
+        unique=True, default=uuid.uuid4, editable=False,
+        verbose_name="Токен")
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='chunked_uploads',
+        verbose_name="Пользователь")
+    filename = models.CharField(max_length=256, verbose_name="Имя файла")
+    length = models.PositiveBigIntegerField(verbose_name="Размер")
+    offset = models.PositiveBigIntegerField(
+        default=0, verbose_name="Получено байт")
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name="Добавлено")
+
+    class Meta:
+        verbose_name = "загрузка по частям"
+        verbose_name_plural = "Загрузки по частям"
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.length})"
+
+    @property
+    def is_complete(self):
+        return self.offset == self.length
+
+    @property
+    def path(self):
+        return os.path.join(
+            settings.BLOG_CHUNKED_UPLOAD_DIR, f'{self.token}.part')
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.delete()
@@ -0,0 +1,129 @@
+"""Урезание bootstrap.min.css под классы, которые реально встречаются.
+
+CSS разбирается на правила верхнего уровня и блоки @media/@supports.
+Селектор остаётся, если все его классы встречаются в «содержимом»:
+шаблонах проекта и исходниках django_bootstrap5, который сам добавляет
+классы полям форм. Правило без оставшихся селекторов выбрасывается.
+Критическая часть — правила, которым хватает классов и тегов шаблонов
+первого экрана; она встраивается в <style> в base.html.
+"""
+import re
+from pathlib import Path
+
+TOKEN_RE = re.compile(r'[A-Za-z0-9_-]+')
+TAG_RE = re.compile(r'<([a-z][a-z0-9]*)')
+CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][_a-zA-Z0-9-]*)')
+SELECTOR_TAG_RE = re.compile(r'(?:^|[\s>+~(])([a-z][a-z0-9]*)')
+NOT_RE = re.compile(r':not\([^)]*\)')
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+# Блоки с правилами внутри; остальные @-правила (@keyframes, @font-face)
+# переносятся целиком.
+NESTED_AT_RULES = ('@media', '@supports')
+
+
+def content_tokens(paths, suffixes=('.html', '.py')):
+    """Все слова из файлов-источников: кандидаты в имена классов."""
+    tokens = set()
+    for root in paths:
+        root = Path(root)
+        files = [root] if root.is_file() else (
+            path for path in root.rglob('*') if path.suffix in suffixes)
+        for path in files:
+            tokens.update(TOKEN_RE.findall(
+                path.read_text(encoding='utf-8', errors='ignore')))
+    return tokens
+
+
+def template_tags(paths):
+    tags = {'html', 'body'}
+    for path in paths:
+        tags.update(TAG_RE.findall(Path(path).read_text(encoding='utf-8')))
+    return tags
+
+
+def parse(css):
+    """Разбивает CSS на список (прелюдия, тело) верхнего уровня."""
+    css = COMMENT_RE.sub('', css)
+    rules = []
+    depth = 0
+    start = body_start = 0
+    quote = None
+    for index, char in enumerate(css):
+        if quote:
+            if char == quote and css[index - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == ';' and depth == 0:
+            # @charset, @import и прочие правила без блока.
+            rules.append((css[start:index + 1].strip(), None))
+            start = index + 1
+        elif char == '{':
+            if depth == 0:
+                body_start = index
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((
+                    css[start:body_start].strip(),
+                    css[body_start + 1:index]))
+                start = index + 1
+    return rules
+
+
+def selector_classes(selector):
+    return set(CLASS_RE.findall(NOT_RE.sub('', selector)))
+
+
+def selector_tags(selector):
+    selector = re.sub(r'\[[^\]]*\]', '', NOT_RE.sub('', selector))
+    return set(SELECTOR_TAG_RE.findall(selector))
+
+
+def filter_rules(rules, keep_selector):
+    """Собирает CSS из правил, оставляя селекторы, прошедшие keep_selector."""
+    output = []
+    for prelude, body in rules:
+        if body is None:
+            if prelude.startswith('@charset'):
+                output.append(prelude)
+            continue
+        if prelude.startswith(NESTED_AT_RULES):
+            inner = filter_rules(parse(body), keep_selector)
+            if inner:
+                output.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            output.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [
+                selector for selector in prelude.split(',')
+                if keep_selector(selector.strip())]
+            if selectors:
+                output.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(output)
+
+
+def purge(css, tokens):
+    """Оставляет селекторы, все классы которых есть среди tokens."""
+    return filter_rules(
+        parse(css), lambda selector: selector_classes(selector) <= tokens)
+
+
+def critical(css, tokens, tags):
+    """Правила первого экрана: классы из tokens и теги из tags.
+
+    @charset, печатные стили и @-правила без вложенных селекторов
+    (анимации, шрифты) в критическую часть не попадают: им хватит полной
+    таблицы.
+    """
+    def keep(selector):
+        return (selector_classes(selector) <= tokens
+                and selector_tags(selector) <= tags)
+
+    rules = [
+        (prelude, body) for prelude, body in parse(css)
+        if body is not None and not prelude.startswith('@media print')
+        and (not prelude.startswith('@')
+             or prelude.startswith(NESTED_AT_RULES))]
+    return filter_rules(rules, keep)
@@ -0,0 +1,73 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.defaultfilters import linebreaksbr
+from django.utils.safestring import mark_safe
+
+# Увеличьте версию при изменении render_body: старые записи в кеше
+# перестанут использоваться, а render_bodies отрисует тексты заново.
+RENDERER_VERSION = 1
+BODY_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def body_cache():
+    """Общий для процессов кеш готового HTML (BLOG_BODY_CACHE)."""
+    return caches[settings.BLOG_BODY_CACHE]
+
+
+def render_body(text):
+    return linebreaksbr(text, autoescape=True)
+
+
+def body_cache_key(text):
+    # Ключ зависит от содержимого, поэтому правка текста в одном процессе
+    # не оставляет устаревший HTML в кешах других процессов.
+    digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+    return f'blog:body:v{RENDERER_VERSION}:{digest}'
+
+
+class RenderedBodyMixin:
+    """Хранит готовый HTML поля text в кеше, заполняя его при save()."""
+
+    def _body_cache_key(self):
+        return body_cache_key(self.text)
+
+    @property
+    def text_html(self):
+        html = getattr(self, '_text_html', None)
+        if html is None:
+            html = body_cache().get(self._body_cache_key())
+        if html is None:
+            html = render_body(self.text)
+            body_cache().set(self._body_cache_key(), html, BODY_CACHE_TIMEOUT)
+        self._text_html = html
+        return mark_safe(html)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self._text_html = render_body(self.text)
+            body_cache().set(
+                self._body_cache_key(), self._text_html, BODY_CACHE_TIMEOUT)
+
+
+def prime_text_html(objects):
+    """Загружает HTML для набора объектов одним запросом к кешу."""
+    objects = list(objects)
+    keys = {}
+    for obj in objects:
+        keys.setdefault(obj._body_cache_key(), []).append(obj)
+    cache = body_cache()
+    found = cache.get_many(keys)
+    missing = {}
+    for key, same_text in keys.items():
+        html = found.get(key)
+        if html is None:
+            html = missing[key] = render_body(same_text[0].text)
+        for obj in same_text:
+            obj._text_html = html
+    if missing:
+        cache.set_many(missing, BODY_CACHE_TIMEOUT)
+    return objects
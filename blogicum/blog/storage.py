@@ -0,0 +1,453 @@
+"""Хранилища файлов публикаций с адресацией по содержимому.
+
+Файл сохраняется под именем, полученным из SHA-256 его байтов, поэтому
+одинаковые загрузки занимают место один раз, а URL файла никогда не
+меняет содержимое и может кешироваться браузером бессрочно. Число
+ссылок на файл хранится в модели StoredFile; delete() удаляет файл
+только после освобождения последней ссылки. Ссылки на изображение
+публикации освобождает Post: при замене файла и при удалении записи.
+
+Байты хранятся либо в MEDIA_ROOT (ContentAddressedStorage), либо в
+S3-совместимом объектном хранилище (ContentAddressedObjectStorage), что
+выбирается настройкой BLOG_MEDIA_STORAGE.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone as django_timezone
+from django.utils.functional import cached_property
+
+HASHED_NAME_RE = re.compile(r'^[^/]+/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+def is_hashed_name(name):
+    return bool(HASHED_NAME_RE.match(name))
+
+
+def release_on_commit(storage, names):
+    """Освобождает ссылки на файлы после фиксации текущей транзакции.
+
+    Файлы со старыми (не хешированными) именами ссылками не учитываются
+    и не трогаются.
+    """
+    names = [name for name in names if name and is_hashed_name(name)]
+    if not names:
+        return
+
+    def release():
+        for name in names:
+            storage.delete(name)
+
+    transaction.on_commit(release)
+
+
+class ContentAddressedMixin:
+    """Общая логика адресации по содержимому и подсчёта ссылок.
+
+    Хранилище-наследник реализует store_blob(), delete_blob(),
+    delete_unreferenced() и iter_files().
+    """
+
+    @staticmethod
+    def _stored_files():
+        return apps.get_model('blog', 'StoredFile').objects
+
+    def get_available_name(self, name, max_length=None):
+        # Имя всё равно будет заменено хешем в _save().
+        return name
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        prefix = name.replace('\\', '/').split('/', 1)[0]
+        ext = os.path.splitext(name)[1].lower()
+        return f'{prefix}/{digest[:2]}/{digest}{ext}'
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        # Сначала ссылка, потом байты: delete() удаляет файл, держа
+        # блокировку строки, и не может стереть его после того, как
+        # store_blob() решил, что файл уже есть.
+        self._add_reference(name, content.size)
+        try:
+            self.store_blob(name, content)
+        except BaseException:
+            self.delete(name)
+            raise
+        return name
+
+    def _add_reference(self, name, size):
+        stored_files = self._stored_files()
+        increment = {
+            'refcount': F('refcount') + 1,
+            'updated_at': django_timezone.now(),
+        }
+        if stored_files.filter(name=name).update(**increment):
+            return
+        try:
+            with transaction.atomic():
+                stored_files.create(name=name, size=size, refcount=1)
+        except IntegrityError:
+            stored_files.filter(name=name).update(**increment)
+
+    def delete(self, name):
+        """Освобождает ссылку; файл удаляется вместе с последней."""
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        stored_files = self._stored_files()
+        with transaction.atomic():
+            stored = stored_files.select_for_update().filter(
+                name=name).first()
+            if stored is not None and stored.refcount > 1:
+                stored_files.filter(id=stored.id).update(
+                    refcount=F('refcount') - 1,
+                    updated_at=django_timezone.now())
+                return
+            if stored is not None:
+                stored.delete()
+            # Внутри транзакции: параллельный _save() тех же байтов ждёт
+            # блокировку и после неё запишет файл заново.
+            self.delete_blob(name)
+
+
+class ContentAddressedStorage(ContentAddressedMixin, FileSystemStorage):
+
+    def store_blob(self, name, content):
+        path = self.path(name)
+        if os.path.exists(path):
+            try:
+                # Те же байты уже есть. Обновляем время изменения, чтобы
+                # --grace в gc_media защищал и повторную загрузку.
+                os.utime(path)
+                return
+            except FileNotFoundError:
+                # Файл только что удалили: записываем заново.
+                pass
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    tmp.write(chunk)
+            os.chmod(tmp_path, self.file_permissions_mode or 0o644)
+            # Одновременная запись тех же байтов безопасна: replace
+            # атомарен, а содержимое одинаково.
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def delete_blob(self, name):
+        FileSystemStorage.delete(self, name)
+
+    def delete_unreferenced(self, name):
+        self.delete_blob(name)
+
+    def iter_files(self, prefix):
+        """Возвращает (имя, размер, время изменения) файлов под prefix."""
+        root = self.path('')
+        for directory, _, files in os.walk(os.path.join(root, prefix)):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                stat = os.stat(path)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                yield name, stat.st_size, stat.st_mtime
+
+
+class LocalObjectClient:
+    """Заменитель S3 для разработки и тестов: объекты в каталоге.
+
+    Повторяет используемое подмножество API, включая multipart-загрузку,
+    чтобы ObjectStorage работал одинаково с обоими клиентами.
+    """
+
+    def __init__(self, root):
+        self.root = os.fspath(root)
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def head(self, key):
+        try:
+            stat = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return stat.st_size, datetime.fromtimestamp(
+            stat.st_mtime, timezone.utc)
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, key):
+        with open(self._path(key), 'rb') as source:
+            return source.read()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def create_multipart(self, key):
+        upload_dir = tempfile.mkdtemp(
+            dir=self._multipart_root(), prefix='upload-')
+        return os.path.basename(upload_dir)
+
+    def upload_part(self, key, upload_id, number, data):
+        path = os.path.join(self._multipart_root(), upload_id, f'{number:05}')
+        with open(path, 'wb') as part:
+            part.write(data)
+        return hashlib.md5(data).hexdigest()
+
+    def complete_multipart(self, key, upload_id, parts):
+        upload_dir = os.path.join(self._multipart_root(), upload_id)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(upload_dir, 'complete')
+        with open(tmp_path, 'wb') as target:
+            for number, _ in sorted(parts):
+                with open(os.path.join(upload_dir, f'{number:05}'),
+                          'rb') as part:
+                    target.write(part.read())
+        os.replace(tmp_path, path)
+        self.abort_multipart(key, upload_id)
+
+    def abort_multipart(self, key, upload_id):
+        upload_dir = os.path.join(self._multipart_root(), upload_id)
+        for filename in os.listdir(upload_dir):
+            os.remove(os.path.join(upload_dir, filename))
+        os.rmdir(upload_dir)
+
+    def list(self, prefix):
+        root = self._path(prefix)
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                stat = os.stat(path)
+                key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                yield key, stat.st_size, datetime.fromtimestamp(
+                    stat.st_mtime, timezone.utc)
+
+    def _multipart_root(self):
+        root = os.path.join(self.root, '.multipart')
+        os.makedirs(root, exist_ok=True)
+        return root
+
+
+class S3Client:
+    """Клиент S3-совместимого API поверх boto3 (необязательная зависимость)."""
+
+    def __init__(self, bucket, **client_kwargs):
+        try:
+            import boto3
+        except ImportError:
+            raise ImproperlyConfigured(
+                'Для BLOG_OBJECT_STORAGE с CLIENT="s3" установите boto3.')
+        self.bucket = bucket
+        self.client = boto3.client('s3', **client_kwargs)
+
+    def head(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise
+        return response['ContentLength'], response['LastModified']
+
+    def put(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def get(self, key):
+        return self.client.get_object(
+            Bucket=self.bucket, Key=key)['Body'].read()
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def create_multipart(self, key):
+        return self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=key)['UploadId']
+
+    def upload_part(self, key, upload_id, number, data):
+        return self.client.upload_part(
+            Bucket=self.bucket, Key=key, UploadId=upload_id,
+            PartNumber=number, Body=data)['ETag']
+
+    def complete_multipart(self, key, upload_id, parts):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={'Parts': [
+                {'PartNumber': number, 'ETag': etag}
+                for number, etag in sorted(parts)
+            ]})
+
+    def abort_multipart(self, key, upload_id):
+        self.client.abort_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    def list(self, prefix):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get('Contents', ()):
+                yield item['Key'], item['Size'], item['LastModified']
+
+
+# Удаления выполняются в фоне: запрос не ждёт ответа хранилища.
+_delete_executor = ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix='media-delete')
+
+
+class ObjectStorage(Storage):
+    """Хранилище Django поверх S3-совместимого клиента.
+
+    url() собирается из BASE_URL без обращений к сети, поэтому списки
+    публикаций не делают запросов к хранилищу.
+    """
+
+    def __init__(self, client=None, base_url=None, part_size=None,
+                 upload_workers=None):
+        self._client = client
+        self._base_url = base_url
+        self._part_size = part_size
+        self._upload_workers = upload_workers
+
+    @property
+    def options(self):
+        return settings.BLOG_OBJECT_STORAGE
+
+    @cached_property
+    def client(self):
+        if self._client is not None:
+            return self._client
+        if self.options['CLIENT'] == 's3':
+            return S3Client(
+                self.options['BUCKET'], **self.options.get('S3', {}))
+        return LocalObjectClient(self.options.get('ROOT', settings.MEDIA_ROOT))
+
+    @property
+    def base_url(self):
+        return self._base_url or self.options.get(
+            'BASE_URL', settings.MEDIA_URL)
+
+    @property
+    def part_size(self):
+        return self._part_size or self.options.get('PART_SIZE', 8 * 2 ** 20)
+
+    def _open(self, name, mode='rb'):
+        return ContentFile(self.client.get(name), name=name)
+
+    def _save(self, name, content):
+        self.store_blob(name, content)
+        return name
+
+    def store_blob(self, name, content):
+        if self.client.head(name) is not None:
+            return
+        if content.size <= self.part_size:
+            content.seek(0)
+            self.client.put(name, content.read())
+        else:
+            self._multipart_upload(name, content)
+
+    def _multipart_upload(self, name, content):
+        upload_id = self.client.create_multipart(name)
+        workers = self._upload_workers or self.options.get(
+            'UPLOAD_WORKERS', 4)
+        parts = []
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Не больше workers частей в полёте: следующая часть
+                # читается, только когда отправлена самая старая, и память
+                # не растёт с размером файла.
+                pending = deque()
+                for number, chunk in enumerate(
+                        content.chunks(self.part_size), start=1):
+                    if len(pending) >= workers:
+                        done_number, future = pending.popleft()
+                        parts.append((done_number, future.result()))
+                    pending.append((number, executor.submit(
+                        self.client.upload_part, name, upload_id, number,
+                        chunk)))
+                for number, future in pending:
+                    parts.append((number, future.result()))
+            self.client.complete_multipart(name, upload_id, parts)
+        except BaseException:
+            self.client.abort_multipart(name, upload_id)
+            raise
+
+    def delete(self, name):
+        self.delete_unreferenced(name)
+
+    def delete_blob(self, name):
+        self.client.delete(name)
+
+    def delete_unreferenced(self, name):
+        return _delete_executor.submit(self.delete_blob, name)
+
+    def exists(self, name):
+        return self.client.head(name) is not None
+
+    def size(self, name):
+        return self.client.head(name)[0]
+
+    def get_modified_time(self, name):
+        return self.client.head(name)[1]
+
+    def url(self, name):
+        return f'{self.base_url}{name}'
+
+    def iter_files(self, prefix):
+        for key, size, modified in self.client.list(prefix):
+            yield key, size, modified.timestamp()
+
+    def listdir(self, path):
+        path = path.rstrip('/') + '/' if path else ''
+        directories, files = set(), []
+        for key, _, _ in self.client.list(path):
+            head, _, tail = key[len(path):].partition('/')
+            if tail:
+                directories.add(head)
+            else:
+                files.append(head)
+        return sorted(directories), files
+
+
+class ContentAddressedObjectStorage(ContentAddressedMixin, ObjectStorage):
+    pass
+
+
+_post_image_storage = None
+
+
+def get_post_image_storage():
+    global _post_image_storage
+    if _post_image_storage is None:
+        if settings.BLOG_MEDIA_STORAGE == 'object':
+            _post_image_storage = ContentAddressedObjectStorage()
+        else:
+            _post_image_storage = ContentAddressedStorage()
+    return _post_image_storage
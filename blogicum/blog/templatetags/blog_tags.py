@@ -0,0 +1,40 @@
+import functools
+from pathlib import Path
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_card.html')
+def post_card(post):
+    """Карточка публикации для лент.
+
+    Шаблон карточки ищется один раз за рендеринг страницы, а не на каждой
+    итерации цикла, как с {% include %}; ссылки вычисляются здесь по одному
+    разу, и в контекст карточки попадает только то, что она выводит.
+    """
+    category = post.category
+    return {
+        'post': post,
+        'detail_url': post.get_absolute_url(),
+        'author_url': post.author.get_absolute_url(),
+        'category_url': category and category.get_absolute_url(),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def read_static(path):
+    fullpath = finders.find(path)
+    if fullpath is None:
+        raise template.TemplateSyntaxError(
+            f'Статический файл {path} не найден.')
+    return Path(fullpath).read_text(encoding='utf-8')
+
+
+@register.simple_tag
+def inline_static(path):
+    """Содержимое статического файла для встраивания прямо в страницу."""
+    return mark_safe(read_static(path))
@@ -0,0 +1,89 @@
+"""Приём изображений с ограничением памяти.
+
+SizeLimitUploadHandler отбрасывает файлы больше BLOG_UPLOAD_MAX_BYTES,
+не дочитывая их. Размеры изображения определяются по заголовку без
+декодирования пикселей, а слишком большие оригиналы уменьшаются при
+приёме.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from PIL import Image
+
+from .images import _encode, probe_image, upright
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """Должен стоять первым в FILE_UPLOAD_HANDLERS."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.BLOG_UPLOAD_MAX_BYTES:
+            rejected = getattr(self.request, 'rejected_uploads', set())
+            rejected.add(self.field_name)
+            self.request.rejected_uploads = rejected
+            raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class AssembledUpload(File):
+    """Файл, собранный из частей: проверяется Pillow прямо с диска."""
+
+    content_type = None
+
+    def __init__(self, upload):
+        super().__init__(open(upload.path, 'rb'), name=upload.filename)
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def check_image_upload(file):
+    if file.size > settings.BLOG_UPLOAD_MAX_BYTES:
+        raise ValidationError(
+            'Файл слишком большой: допустимо не более %(limit)s МБ.',
+            code='file_too_large',
+            params={'limit': settings.BLOG_UPLOAD_MAX_BYTES // 2 ** 20})
+    try:
+        _, width, height = probe_image(file)
+    except Image.DecompressionBombError:
+        width = height = None
+    except Exception:
+        # Ошибку формата сообщит стандартная проверка ImageField.
+        return
+    if width is None or width * height > settings.BLOG_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Изображение слишком большое: допустимо не более '
+            '%(limit)s мегапикселей.', code='too_many_pixels',
+            params={'limit': settings.BLOG_IMAGE_MAX_PIXELS // 10 ** 6})
+
+
+def downscale_upload(file):
+    """Уменьшает оригинал до BLOG_IMAGE_MAX_SIDE по большей стороне.
+
+    JPEG декодируется сразу в уменьшенном масштабе (Image.draft), так
+    что полный растр в памяти не создаётся. EXIF в новый файл не
+    переносится, поэтому растр поворачивается по тегу Orientation.
+    """
+    max_side = settings.BLOG_IMAGE_MAX_SIDE
+    image_format, width, height = probe_image(file)
+    if max(width, height) <= max_side:
+        return file
+    with Image.open(file) as original:
+        # Рамка квадратная, поэтому draft можно запросить до поворота.
+        original.draft(original.mode, (max_side, max_side))
+        image = upright(original)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        content = _encode(image, image_format)
+    file.seek(0)
+    return SimpleUploadedFile(
+        file.name, content, content_type=getattr(file, 'content_type', None))
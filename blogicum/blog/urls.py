@@ -27,4 +27,8 @@ urlpatterns = [
          views.EditCommentView.as_view(), name='edit_comment'),
     path('posts/<int:post_id>/delete_comment/<int:comment_id>/',
          views.CommentDeleteView.as_view(), name='delete_comment'),
+    path('uploads/', views.ChunkedUploadCreateView.as_view(),
+         name='chunked_upload_create'),
+    path('uploads/<uuid:token>/',
+         views.ChunkedUploadView.as_view(), name='chunked_upload'),
 ]
@@ -1,4 +1,12 @@
+import os
+
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import get_object_or_404, redirect
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, StreamingHttpResponse)
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+from django.views import View
 from django.views.generic import ListView, DetailView
 from django.views.generic import UpdateView, CreateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -6,8 +14,13 @@ from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
 from django.utils.timezone import now
 from django.utils import timezone
-from .models import Post, Category, User, Comment
-from .forms import CommentForm, UserForm
+from .models import ChunkedUpload, Post, Category, User, Comment
+from .forms import CommentForm, PostForm, UserForm
+from .rendering import prime_text_html
+from .cards import card_queryset
+from .jobs import enqueue_image_job
+from .templatetags.blog_tags import post_card
+from django.conf import settings
 from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.db.models import Count
@@ -17,26 +30,87 @@ class PostBaseMixin:
     model = Post
     pk_url_kwarg = 'post_id'
     template_name = 'blog/create.html'
-    fields = ['title', 'text', 'pub_date', 'location', 'category', 'image']
+    form_class = PostForm
 
     def get_success_url(self):
         return reverse('blog:profile', args=[self.request.user.username])
 
 
+class PostImageMixin:
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['rejected_uploads'] = getattr(
+            self.request, 'rejected_uploads', ())
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if form.image_changed:
+            enqueue_image_job(self.object)
+        form.discard_chunked_upload()
+        return response
+
+
 class RedirectToPostMixin:
     def get_success_url(self) -> str:
         return reverse('blog:post_detail', args=[self.kwargs['post_id']])
 
 
-class IndexView(ListView):
+class PostCardsMixin:
+    """Отдаёт в шаблон карточки вместо моделей, если это включено."""
+
+    def paginate_queryset(self, queryset, page_size):
+        if settings.BLOG_CARD_PROJECTION:
+            queryset = card_queryset(queryset)
+        return super().paginate_queryset(queryset, page_size)
+
+
+class StreamingListMixin:
+    """Потоковая отдача ленты при BLOG_STREAMING_LISTINGS.
+
+    Страница рисуется заранее с меткой вместо карточек: всё до метки
+    (<head>, шапка, заголовок) уходит клиенту сразу, затем карточки по мере
+    чтения из базы, затем пагинатор и подвал. Обе части вокруг карточек
+    рендерятся ещё во view, так что контекст-процессоры, сессия и CSRF
+    отрабатывают до middleware, как и у обычного ответа.
+
+    Под ASGI страница отдаётся целиком: Django 3.2 читает поток в цикле
+    событий, где запросы к базе из stream_cards запрещены.
+    """
+
+    card_marker = mark_safe('<!-- cards -->')
+    chunk_size = 20
+
+    def render_to_response(self, context, **response_kwargs):
+        if (not settings.BLOG_STREAMING_LISTINGS
+                or isinstance(self.request, ASGIRequest)):
+            return super().render_to_response(context, **response_kwargs)
+        context['card_stream'] = self.card_marker
+        html = render_to_string(
+            self.get_template_names(), context, self.request)
+        head, tail = html.split(self.card_marker)
+        return StreamingHttpResponse(
+            self.stream_cards(head, context['page_obj'], tail),
+            content_type=self.content_type)
+
+    def stream_cards(self, head, page, tail):
+        yield head
+        template = get_template('includes/post_card.html')
+        for post in page.object_list.iterator(chunk_size=self.chunk_size):
+            yield template.render(post_card(post))
+        yield tail
+
+
+class IndexView(StreamingListMixin, PostCardsMixin, ListView):
     model = Post
     template_name = 'blog/index.html'
     context_object_name = 'post_list'
     paginate_by = 10
 
     def get_queryset(self):
-        return Post.objects.select_related('category').annotate(
-            comment_count=Count('comments')).filter(
+        return Post.objects.select_related('category').defer(
+            'text').annotate(comment_count=Count('comments')).filter(
             is_published=True, category__is_published=True,
             pub_date__lte=now()).order_by('-pub_date')
 
@@ -59,7 +133,8 @@ class PostDetailView(PostBaseMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update({
-            'comments': self.get_object().comments.all(),
+            'comments': prime_text_html(
+                self.object.comments.select_related('author')),
             'form': CommentForm(),
         })
         return context
@@ -76,7 +151,7 @@ class CommentChangeMixin(RedirectToPostMixin):
         return super().dispatch(request, *args, **kwargs)
 
 
-class CategoryPostsView(ListView):
+class CategoryPostsView(StreamingListMixin, PostCardsMixin, ListView):
     model = Post
     template_name = 'blog/category.html'
     context_object_name = 'post_list'
@@ -85,13 +160,13 @@ class CategoryPostsView(ListView):
     def get_queryset(self):
         category = get_object_or_404(
             Category, is_published=True, slug=self.kwargs['category_slug'])
-        return Post.objects.filter(
+        return Post.objects.defer('text').filter(
             category=category, is_published=True,
             pub_date__lte=now()).order_by('-pub_date').annotate(
                 comment_count=Count('comments'))
 
 
-class ProfileView(ListView):
+class ProfileView(StreamingListMixin, PostCardsMixin, ListView):
     model = Post
     template_name = 'blog/profile.html'
     context_object_name = 'posts'
@@ -99,7 +174,7 @@ class ProfileView(ListView):
 
     def get_queryset(self):
         user = get_object_or_404(User, username=self.kwargs['username'])
-        return Post.objects.filter(author=user).order_by(
+        return Post.objects.defer('text').filter(author=user).order_by(
             '-pub_date').annotate(comment_count=Count('comments'))
 
     def get_context_data(self, **kwargs):
@@ -124,7 +199,7 @@ class EditProfileView(UpdateView):
 
 
 @method_decorator(login_required, name='dispatch')
-class CreatePostView(PostBaseMixin, CreateView):
+class CreatePostView(PostImageMixin, PostBaseMixin, CreateView):
     def form_valid(self, form):
         form.instance.author = self.request.user
         return super().form_valid(form)
@@ -175,7 +250,7 @@ class CommentDeleteView(LoginRequiredMixin, DeleteView):
 
 
 @method_decorator(login_required, name='dispatch')
-class EditPostView(PostBaseMixin, UpdateView):
+class EditPostView(PostImageMixin, PostBaseMixin, UpdateView):
     def dispatch(self, request, *args, **kwargs):
         if request.user != self.get_object().author:
             return redirect('blog:post_detail', self.kwargs['post_id'])
@@ -193,3 +268,81 @@ class DeletePostView(LoginRequiredMixin, PostBaseMixin, DeleteView):
         if request.user != self.get_object().author:
             return redirect('blog:post_detail', self.kwargs['post_id'])
         return super().dispatch(request, *args, **kwargs)
+
+
+class ChunkedUploadCreateView(LoginRequiredMixin, View):
+    """Создаёт загрузку по частям (по образцу протокола tus)."""
+
+    def post(self, request):
+        try:
+            length = int(request.headers['Upload-Length'])
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest('Нужен заголовок Upload-Length.')
+        if not 0 < length <= settings.BLOG_UPLOAD_MAX_BYTES:
+            return HttpResponse(status=413)
+        filename = os.path.basename(
+            request.headers.get('Upload-Filename', '')) or 'upload'
+        upload = ChunkedUpload.objects.create(
+            user=request.user, filename=filename, length=length)
+        os.makedirs(settings.BLOG_CHUNKED_UPLOAD_DIR, exist_ok=True)
+        open(upload.path, 'wb').close()
+        response = HttpResponse(status=201)
+        response['Location'] = reverse(
+            'blog:chunked_upload', args=[upload.token])
+        response['Upload-Offset'] = '0'
+        return response
+
+
+class ChunkedUploadView(LoginRequiredMixin, View):
+    """Докачка частей: HEAD — текущее смещение, PATCH — следующая часть."""
+
+    chunk_size = 64 * 1024
+
+    def get_upload(self):
+        return get_object_or_404(
+            ChunkedUpload, token=self.kwargs['token'], user=self.request.user)
+
+    @staticmethod
+    def offset_response(upload, status=200):
+        response = HttpResponse(status=status)
+        response['Upload-Offset'] = str(upload.offset)
+        response['Upload-Length'] = str(upload.length)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def head(self, request, token):
+        return self.offset_response(self.get_upload())
+
+    def patch(self, request, token):
+        upload = self.get_upload()
+        if request.content_type != 'application/offset+octet-stream':
+            return HttpResponse(status=415)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest('Нужен заголовок Upload-Offset.')
+        if offset != upload.offset:
+            return self.offset_response(upload, status=409)
+        position = offset
+        # Тело читается из потока частями и сразу пишется на диск.
+        with open(upload.path, 'r+b') as target:
+            target.seek(offset)
+            while True:
+                chunk = request.read(self.chunk_size)
+                if not chunk:
+                    break
+                if position + len(chunk) > upload.length:
+                    return HttpResponse(status=413)
+                target.write(chunk)
+                position += len(chunk)
+        if not ChunkedUpload.objects.filter(
+                id=upload.id, offset=offset).update(offset=position):
+            # Параллельный PATCH успел раньше.
+            upload.refresh_from_db()
+            return self.offset_response(upload, status=409)
+        upload.offset = position
+        return self.offset_response(upload, status=204)
+
+    def delete(self, request, token):
+        self.get_upload().discard()
+        return HttpResponse(status=204)
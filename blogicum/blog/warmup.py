@@ -0,0 +1,32 @@
+"""Предварительный разбор шаблонов проекта.
+
+cached.Loader компилирует шаблон при первом обращении, поэтому первый
+запрос каждого воркера платит за чтение и разбор base.html, post_card.html
+и остальных. warm_templates() делает это заранее из BlogConfig.ready()
+при BLOG_TEMPLATE_WARMUP; выигрыш меряет команда bench_templates.
+"""
+from pathlib import Path
+
+from django.template import engines
+
+
+def project_template_names(engine):
+    """Имена всех шаблонов из DIRS движка (templates/ и jinja2/ проекта)."""
+    for directory in engine.dirs:
+        root = Path(directory)
+        for path in sorted(root.rglob('*.html')):
+            yield path.relative_to(root).as_posix()
+
+
+def warm_templates():
+    """Компилирует шаблоны проекта в кэш загрузчика; возвращает их имена.
+
+    Синтаксическая ошибка в шаблоне не глушится: процесс лучше уронить
+    при старте, чем на запросе пользователя.
+    """
+    warmed = []
+    for engine in engines.all():
+        for name in project_template_names(engine):
+            engine.get_template(name)
+            warmed.append(name)
+    return warmed
@@ -3,6 +3,14 @@ ASGI config for blogicum project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Run it with any ASGI server, e.g. ``uvicorn blogicum.asgi:application``.
+The static pages (pages.views.About/Rules) are async views and are served
+on the event loop; the rest of the views run in Django's thread pool.
+The blog listings stay sync on purpose: they are not cached, so every
+request reads the database and an async version would only move each
+query back to the same thread.
+``manage.py bench_asgi`` compares WSGI and ASGI throughput under uvicorn.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
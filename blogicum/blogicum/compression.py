@@ -0,0 +1,140 @@
+"""Сжатие текстовых ответов: brotli (если установлен пакет brotli) и gzip.
+
+Кодировка выбирается по Accept-Encoding с учётом q-значений, ответ
+получает Vary: Accept-Encoding. Сжатые байты обычных ответов кладутся в
+кэш под ключом из хеша тела: страница, которая отдаётся повторно без
+изменений, берёт готовые байты и не сжимается заново. Кэшируются только
+ответы без cookies (is_shared_response): страницы с сессией или
+CSRF-токеном у каждого посетителя свои и вытесняли бы из кэша общие.
+Потоковые ответы
+сжимаются по частям со сбросом буфера после каждой части, чтобы поток
+не превращался в один кусок в конце.
+"""
+import gzip
+import hashlib
+import re
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ACCEPT_ENCODING_RE = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q=([\d.]+))?\s*$')
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encoding, available=None):
+    """Лучшая из доступных кодировок или None (при равных q — br)."""
+    weights = {}
+    for item in accept_encoding.split(','):
+        match = ACCEPT_ENCODING_RE.match(item)
+        if not match:
+            continue
+        coding, q = match.group(1).lower(), match.group(2)
+        try:
+            weights[coding] = float(q) if q is not None else 1.0
+        except ValueError:
+            continue
+    best, best_q = None, 0.0
+    for coding in available or available_encodings():
+        q = weights.get(coding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    # 16 + MAX_WBITS — заголовок и хвост gzip вместо голого zlib.
+    compressor = zlib.compressobj(
+        GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def cached_compress(content, encoding):
+    """compress() с кэшем по хешу тела и кодировке."""
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    key = f'compressed:{encoding}:{digest}'
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = compress(content, encoding)
+        cache.set(key, compressed, settings.BLOG_COMPRESS_CACHE_TIMEOUT)
+    return compressed
+
+
+def is_shared_response(request, response):
+    """Ответ, одинаковый для всех анонимных посетителей."""
+    return not request.COOKIES and not response.cookies
+
+
+def is_compressible(response):
+    if response.has_header('Content-Encoding') or response.status_code != 200:
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip()
+    return content_type in settings.BLOG_COMPRESS_TYPES
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает текстовые ответы не короче BLOG_COMPRESS_MIN_SIZE.
+
+    Как и GZipMiddleware, работает через process_response, поэтому
+    годится и для синхронной, и для асинхронной цепочки.
+    """
+
+    def process_response(self, request, response):
+        if not is_compressible(response):
+            return response
+        if not response.streaming and (
+                len(response.content) < settings.BLOG_COMPRESS_MIN_SIZE):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            compressor = (
+                cached_compress if is_shared_response(request, response)
+                else compress)
+            response.content = compressor(response.content, encoding)
+            response['Content-Length'] = str(len(response.content))
+
+        # Тело изменилось: сильный ETag становится слабым (как в GZip).
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,176 @@
+"""Раздача загруженных файлов из MEDIA_ROOT.
+
+Поддерживает условные запросы (If-None-Match, If-Modified-Since) и
+диапазоны (Range). Если задан MEDIA_ACCEL, само тело отдаёт
+фронтенд-сервер: nginx по X-Accel-Redirect или Apache/lighttpd по
+X-Sendfile. Иначе файл отдаётся через FileResponse, и WSGI-сервер может
+передать его системным вызовом sendfile без копирования.
+"""
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+    StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from blog.storage import is_hashed_name
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _resolve(path, root=None):
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = Path(safe_join(root or settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404('Недопустимый путь.')
+    if not fullpath.is_file():
+        raise Http404('Файл не найден.')
+    return path, fullpath
+
+
+def _etag_matches(header, etag):
+    if header is None:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = (tag.strip() for tag in header.split(','))
+    return etag in (tag[2:] if tag.startswith('W/') else tag
+                    for tag in candidates)
+
+
+def _parse_range(header, size):
+    """Возвращает (начало, конец) включительно или None для всего файла.
+
+    Несколько диапазонов в одном запросе не поддерживаются: тогда
+    отдаётся весь файл, что допускает RFC 7233.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        raise ValueError
+    return start, end
+
+
+def _read_range(fullpath, start, length):
+    with fullpath.open('rb') as source:
+        source.seek(start)
+        while length > 0:
+            chunk = source.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _offload(path, fullpath):
+    response = HttpResponse()
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        prefix = settings.MEDIA_ACCEL_PREFIX.rstrip('/')
+        response['X-Accel-Redirect'] = f'{prefix}/{path}'
+    else:
+        response['X-Sendfile'] = str(fullpath)
+    # Тип и длину выставит фронтенд-сервер.
+    del response['Content-Type']
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    path, fullpath = _resolve(path)
+    return serve_file(
+        request, fullpath, immutable=is_hashed_name(path), accel_path=path)
+
+
+def serve_file(request, fullpath, immutable=False, accel_path=None,
+               version=None):
+    """Отдаёт файл с поддержкой условных запросов и Range.
+
+    immutable — содержимое по этому URL никогда не меняется;
+    accel_path — путь для X-Accel-Redirect относительно MEDIA_ROOT;
+    version — (время изменения, метка) содержимого, если stat самого
+    файла для валидаторов не годится (копии в кеше трогаются при
+    каждом обращении).
+    """
+    stat = fullpath.stat()
+    if version is None:
+        version = (stat.st_mtime, f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+    modified, tag = version
+    if immutable:
+        # Имя уже содержит хеш содержимого; расширение различает сжатые
+        # копии (.gz, .br) одного файла.
+        etag = quote_etag(fullpath.name)
+    else:
+        etag = quote_etag(tag)
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        not_modified = not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            modified, stat.st_size)
+
+    if not_modified:
+        response = HttpResponseNotModified()
+    elif settings.MEDIA_ACCEL and accel_path:
+        response = _offload(accel_path, fullpath)
+    else:
+        response = _file_response(request, fullpath, stat, etag)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modified)
+    if immutable:
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = (
+            f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}')
+    return response
+
+
+def _file_response(request, fullpath, stat, etag):
+    content_type, encoding = mimetypes.guess_type(str(fullpath))
+    content_type = content_type or 'application/octet-stream'
+    size = stat.st_size
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(fullpath.open('rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read_range(fullpath, start, length), status=206,
+            content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,131 @@
+"""Минификация HTML-ответов.
+
+minify_html() — однопроходный токенизатор: одно регулярное выражение
+находит по порядку теги, комментарии и элементы с сырым содержимым
+(pre, textarea, script, style), а текст между ними сжимается. Внутри
+сырых элементов ничего не меняется. Пробельные серии в тексте и внутри
+тегов схлопываются до одного символа: перевода строки, если он в серии
+был, иначе пробела, так что отступы исчезают, а разметка остаётся
+построчной. Пробел рядом с блочным тегом на отображение не влияет и
+выбрасывается. Комментарии удаляются, кроме условных (<!--[if ...]>).
+
+Результат, как и сжатые байты в blogicum.compression, кладётся в кэш
+под ключом из хеша исходного тела, так что одна и та же страница
+минифицируется один раз. Ответы с cookies в кэш не попадают.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+
+from .compression import is_shared_response
+
+TOKEN_RE = re.compile(r'''
+    (?P<raw><(?P<raw_tag>pre|textarea|script|style)\b
+        (?:"[^"]*"|'[^']*'|[^'">])*>.*?</(?P=raw_tag)\s*>)
+  | (?P<comment><!--.*?-->)
+  | (?P<tag></?[A-Za-z](?:"[^"]*"|'[^']*'|[^'">])*>|<![A-Za-z][^>]*>)
+''', re.S | re.I | re.X)
+TAG_NAME_RE = re.compile(r'</?([A-Za-z][A-Za-z0-9]*)')
+TAG_SPACE_RE = re.compile(r'("[^"]*"|\'[^\']*\')|\s+')
+SPACE_RE = re.compile(r'\s+')
+BLOCK_TAGS = frozenset((
+    'address', 'article', 'aside', 'blockquote', 'body', 'br', 'dd', 'div',
+    'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1',
+    'h2', 'h3', 'h4', 'h5', 'h6', 'head', 'header', 'hr', 'html', 'li',
+    'link', 'main', 'meta', 'nav', 'ol', 'p', 'section', 'table', 'tbody',
+    'td', 'tfoot', 'th', 'thead', 'title', 'tr', 'ul', '!doctype',
+))
+
+
+def _is_block(token):
+    match = TAG_NAME_RE.match(token)
+    if match is None:
+        return token[:9].lower() == '<!doctype'
+    return match.group(1).lower() in BLOCK_TAGS
+
+
+def _collapse_space(match):
+    return '\n' if '\n' in match.group() else ' '
+
+
+def _collapse_tag(tag):
+    return TAG_SPACE_RE.sub(
+        lambda match: match.group(1) or _collapse_space(match), tag)
+
+
+def _text(text, after_block, before_block):
+    text = SPACE_RE.sub(_collapse_space, text)
+    if after_block and text[:1] == ' ':
+        text = text[1:]
+    if before_block and text[-1:] == ' ':
+        text = text[:-1]
+    return text
+
+
+def minify_html(html):
+    output = []
+    position = 0
+    pending = ''
+    # Предыдущий токен блочный (или это начало документа).
+    after_block = True
+    for match in TOKEN_RE.finditer(html):
+        kind = match.lastgroup
+        token = match.group()
+        pending += html[position:match.start()]
+        position = match.end()
+        if kind == 'comment' and not token.startswith('<!--[if'):
+            # Текст до и после удалённого комментария склеивается.
+            continue
+        if kind == 'raw':
+            block = match.group('raw_tag').lower() == 'pre'
+        else:
+            block = kind == 'tag' and _is_block(token)
+        output.append(_text(pending, after_block, block))
+        output.append(_collapse_tag(token) if kind == 'tag' else token)
+        pending = ''
+        after_block = block
+    output.append(_text(pending + html[position:], after_block, True))
+    return ''.join(output)
+
+
+def minify_bytes(content, charset):
+    return minify_html(content.decode(charset)).encode(charset)
+
+
+def cached_minify(content, charset):
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    key = f'minified:{digest}'
+    minified = cache.get(key)
+    if minified is None:
+        minified = minify_bytes(content, charset)
+        cache.set(key, minified, settings.BLOG_MINIFY_CACHE_TIMEOUT)
+    return minified
+
+
+class HTMLMinifyMiddleware(MiddlewareMixin):
+    """Минифицирует готовые (не потоковые) text/html-ответы.
+
+    Стоит в MIDDLEWARE ниже CompressionMiddleware: сжимается уже
+    минифицированное тело.
+    """
+
+    def process_response(self, request, response):
+        if (not settings.BLOG_MINIFY_HTML or response.streaming
+                or response.status_code != 200
+                or response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith(
+                    'text/html')):
+            return response
+        minifier = (
+            cached_minify if is_shared_response(request, response)
+            else minify_bytes)
+        response.content = minifier(response.content, response.charset)
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,167 @@
+"""Профилирование рендеринга шаблонов (BLOG_TEMPLATE_PROFILING).
+
+install() оборачивает Template.render у DTL и у бэкенда Jinja2. Через
+Template.render проходят и вложенные шаблоны: {% include %}
+(comments.html) и теги включения (post_card). Для каждого шаблона
+считается время целиком (cumulative) и собственное время (self), то
+есть без вложенных шаблонов. В Jinja2 include компилируется в тот же
+шаблон, поэтому там видны только шаблоны верхнего уровня.
+
+TemplateProfileMiddleware собирает замеры запроса. Сотрудникам он
+отдаёт их в заголовке Server-Timing, а для всех запросов дописывает
+строку в журнал BLOG_TEMPLATE_PROFILE_LOG. Команда template_profile
+сводит журнал по представлениям и шаблонам. Потоковые ответы
+рендерятся уже после middleware, поэтому в замер попадает только их
+шапка.
+"""
+import asyncio
+import contextvars
+import json
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.base import Template
+from django.utils.deprecation import MiddlewareMixin
+
+UNKNOWN_TEMPLATE = '<строка>'
+SERVER_TIMING_TEMPLATES = 10
+
+_recorder = contextvars.ContextVar('template_profile', default=None)
+_installed = False
+
+
+class Recorder:
+    """Замеры одного запроса: шаблон -> [число, cumulative, self]."""
+
+    def __init__(self):
+        self.templates = {}
+        # Время вложенных шаблонов для каждого открытого рендеринга.
+        self.stack = []
+
+    def enter(self):
+        self.stack.append(0.0)
+
+    def exit(self, name, elapsed):
+        children = self.stack.pop()
+        if self.stack:
+            self.stack[-1] += elapsed
+        stats = self.templates.setdefault(name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] += elapsed - children
+
+    @property
+    def render_time(self):
+        return sum(stats[2] for stats in self.templates.values())
+
+
+def instrument(render):
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        recorder = _recorder.get()
+        if recorder is None:
+            return render(self, *args, **kwargs)
+        recorder.enter()
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            recorder.exit(
+                getattr(self, 'name', None) or UNKNOWN_TEMPLATE,
+                time.perf_counter() - started)
+    return wrapper
+
+
+def install():
+    """Оборачивает render() шаблонов; повторный вызов ничего не делает."""
+    global _installed
+    if _installed:
+        return
+    Template.render = instrument(Template.render)
+    try:
+        from blog.jinja2env import Template as JinjaTemplate
+    except ImportError:
+        # Jinja2 не установлен: профилируется только DTL.
+        pass
+    else:
+        JinjaTemplate.render = instrument(JinjaTemplate.render)
+    _installed = True
+
+
+def server_timing(view, duration, recorder):
+    metrics = [
+        f'view;desc="{view}";dur={duration * 1000:.2f}',
+        f'render;dur={recorder.render_time * 1000:.2f}',
+    ]
+    ranked = sorted(
+        recorder.templates.items(), key=lambda item: item[1][2],
+        reverse=True)[:SERVER_TIMING_TEMPLATES]
+    for index, (name, (count, _, self_time)) in enumerate(ranked):
+        metrics.append(
+            f'tpl{index};desc="{name} x{count}";dur={self_time * 1000:.2f}')
+    return ', '.join(metrics)
+
+
+def write_log(view, duration, recorder):
+    record = {
+        'view': view,
+        'duration': duration,
+        'templates': recorder.templates,
+    }
+    with open(settings.BLOG_TEMPLATE_PROFILE_LOG, 'a',
+              encoding='utf-8') as log:
+        log.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+class TemplateProfileMiddleware(MiddlewareMixin):
+    """Замеряет рендеринг шаблонов при BLOG_TEMPLATE_PROFILING.
+
+    Замер оборачивает весь вызов get_response, поэтому __call__ и
+    __acall__ переопределены целиком; выбор между ними — как у
+    MiddlewareMixin.
+    """
+
+    def __init__(self, get_response):
+        if not settings.BLOG_TEMPLATE_PROFILING:
+            raise MiddlewareNotUsed
+        install()
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        recorder = Recorder()
+        token = _recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.finish(
+            request, response, recorder, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        recorder = Recorder()
+        token = _recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        # request.user может быть ещё не загружен, а журнал — это файл.
+        return await sync_to_async(self.finish, thread_sensitive=True)(
+            request, response, recorder, time.perf_counter() - started)
+
+    def finish(self, request, response, recorder, duration):
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        if settings.BLOG_TEMPLATE_PROFILE_LOG:
+            write_log(view, duration, recorder)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            response['Server-Timing'] = server_timing(
+                view, duration, recorder)
+        return response
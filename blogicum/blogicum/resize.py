@@ -0,0 +1,161 @@
+"""Уменьшение изображений публикаций по запросу.
+
+URL вида /media/resize/<подпись>/<ш>x<в>/<путь> подписывается HMAC от
+SECRET_KEY, поэтому перебором размеров нельзя заставить сервер
+создавать произвольные копии. Готовая копия кладётся в дисковый кеш
+BLOG_RESIZE_CACHE_DIR, размер которого ограничен
+BLOG_RESIZE_CACHE_MAX_BYTES: при переполнении удаляются давно не
+запрашивавшиеся файлы. Одновременные запросы одной копии ждут, пока
+её создаст первый из них.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.views.decorators.http import require_safe
+from PIL import Image
+
+from blog.images import _encode, upright
+from blog.storage import is_hashed_name
+
+from .media import _resolve, serve_file
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+_cache_bytes = None
+_cache_bytes_guard = threading.Lock()
+
+
+def sign(width, height, path):
+    value = f'{width}x{height}/{path}'
+    return salted_hmac(
+        'blogicum.resize', value, secret=settings.SECRET_KEY
+    ).hexdigest()[:16]
+
+
+def resized_url(path, width, height=0):
+    return reverse('resized_media', kwargs={
+        'signature': sign(width, height, path),
+        'width': width, 'height': height, 'path': path,
+    })
+
+
+@contextmanager
+def _variant_lock(cache_path):
+    """Блокировка одной копии: между процессами — flock, иначе — потоки."""
+    if fcntl is None:
+        with _thread_locks_guard:
+            lock = _thread_locks.setdefault(cache_path, threading.Lock())
+        with lock:
+            yield
+        return
+    with open(f'{cache_path}.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _render(source, target, width, height):
+    with Image.open(source) as original:
+        image_format = original.format
+        # Рамка задана для изображения в том виде, как его показывают.
+        image = upright(original)
+        image.thumbnail((width or image.width, height or image.height),
+                        Image.LANCZOS)
+        content = _encode(image, image_format)
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent)
+    with os.fdopen(fd, 'wb') as tmp:
+        tmp.write(content)
+    os.replace(tmp_path, target)
+    return len(content)
+
+
+def _scan_cache(root):
+    entries = []
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            if filename.endswith('.lock'):
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def _account(added, keep):
+    """Учитывает новый файл keep и при переполнении вытесняет старые."""
+    global _cache_bytes
+    root = settings.BLOG_RESIZE_CACHE_DIR
+    limit = settings.BLOG_RESIZE_CACHE_MAX_BYTES
+    with _cache_bytes_guard:
+        if _cache_bytes is None:
+            _cache_bytes = sum(size for _, size, _ in _scan_cache(root))
+        else:
+            _cache_bytes += added
+        if _cache_bytes <= limit:
+            return
+        # Счётчик процесса приблизителен: пересчитываем по диску и
+        # удаляем файлы с самым давним временем обращения.
+        entries = sorted(_scan_cache(root))
+        total = sum(size for _, size, _ in entries)
+        target = limit * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if path == str(keep):
+                continue
+            try:
+                os.remove(path)
+                os.remove(f'{path}.lock')
+            except FileNotFoundError:
+                pass
+            total -= size
+        _cache_bytes = total
+
+
+@require_safe
+def serve_resized(request, signature, width, height, path):
+    if not constant_time_compare(signature, sign(width, height, path)):
+        raise Http404('Неверная подпись.')
+    max_side = settings.BLOG_RESIZE_MAX_SIDE
+    if not (0 < width <= max_side and 0 <= height <= max_side):
+        raise Http404('Недопустимый размер.')
+    path, source = _resolve(path)
+    source_mtime = source.stat().st_mtime
+    # Время изменения исходника входит в ключ: правка файла по тому же
+    # пути даёт новую копию, а не устаревшую из кеша.
+    key = hashlib.sha256(
+        f'{width}x{height}/{path}/{source_mtime!r}'.encode()).hexdigest()
+    cache_path = Path(settings.BLOG_RESIZE_CACHE_DIR, key[:2],
+                      key + source.suffix.lower())
+    try:
+        # Время изменения служит отметкой последнего обращения для LRU.
+        os.utime(cache_path)
+    except FileNotFoundError:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with _variant_lock(cache_path):
+            if not cache_path.exists():
+                _account(
+                    _render(source, cache_path, width, height), cache_path)
+    # mtime копии — отметка LRU, поэтому валидаторы строятся от
+    # исходника и ключа.
+    return serve_file(
+        request, cache_path, immutable=is_hashed_name(path),
+        version=(source_mtime, key[:16]))
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blogicum.compression.CompressionMiddleware',
+    'blogicum.minify.HTMLMinifyMiddleware',
+    'blogicum.profiling.TemplateProfileMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,12 +62,24 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 ROOT_URLCONF = 'blogicum.urls'
 
+# Без DEBUG шаблоны разбираются один раз на процесс (cached.Loader),
+# а BlogConfig.ready() прогревает их до первого запроса.
+BLOG_TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    BLOG_TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', BLOG_TEMPLATE_LOADERS),
+    ]
+BLOG_TEMPLATE_WARMUP = not DEBUG
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': BLOG_TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -74,6 +90,22 @@ TEMPLATES = [
     },
 ]
 
+# Необязательный рендеринг ленты, категории, профиля и публикации через
+# Jinja2 (нужен пакет jinja2). Шаблоны из jinja2/ перекрывают одноимённые
+# DTL-шаблоны, остальные страницы по-прежнему рисует DTL.
+BLOG_JINJA2 = False
+JINJA2_TEMPLATES = {
+    'NAME': 'jinja2',
+    'BACKEND': 'blog.jinja2env.Jinja2',
+    'DIRS': [BASE_DIR / 'jinja2'],
+    'OPTIONS': {
+        'environment': 'blog.jinja2env.environment',
+        'context_processors': TEMPLATES[0]['OPTIONS']['context_processors'],
+    },
+}
+if BLOG_JINJA2:
+    TEMPLATES.insert(0, JINJA2_TEMPLATES)
+
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 
@@ -87,6 +119,24 @@ DATABASES = {
     }
 }
 
+# Кеш по умолчанию живёт в памяти процесса: в нём сжатые и
+# минифицированные ответы. Готовый HTML текстов (blog.rendering) хранится
+# отдельно, в таблице базы: он общий для всех процессов, переживает
+# перезапуск и не вытесняется ответами. Таблицу создаёт миграция
+# blog 0010 (или `manage.py createcachetable`), заполняет — render_bodies.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'bodies': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'blog_body_cache',
+        'TIMEOUT': 60 * 60 * 24 * 30,
+        'OPTIONS': {'MAX_ENTRIES': 200_000},
+    },
+}
+BLOG_BODY_CACHE = 'bodies'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -137,12 +187,124 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static_dev',
 ]
 
+# Без DEBUG статика собирается collectstatic в STATIC_ROOT с хешем
+# содержимого в именах и сжатыми копиями .gz/.br (blogicum.staticfiles)
+# и отдаётся с Cache-Control: immutable.
+STATIC_ROOT = BASE_DIR / 'static'
+if not DEBUG:
+    STATICFILES_STORAGE = 'blogicum.staticfiles.PrecompressedManifestStorage'
+BLOG_STATIC_COMPRESS_WORKERS = os.cpu_count() or 1
+
 LANGUAGE_CODE = 'ru-RU'
 
 MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = '/media/'
+
+# Где хранятся байты изображений публикаций: 'filesystem' — MEDIA_ROOT,
+# 'object' — S3-совместимое хранилище из BLOG_OBJECT_STORAGE. Клиент
+# 'local' хранит объекты в каталоге ROOT и подходит для разработки;
+# 's3' требует boto3, параметры клиента передаются в S3.
+BLOG_MEDIA_STORAGE = 'filesystem'
+BLOG_OBJECT_STORAGE = {
+    'CLIENT': 'local',
+    'ROOT': MEDIA_ROOT,
+    'BUCKET': 'blogicum-media',
+    'BASE_URL': MEDIA_URL,
+    'S3': {},
+    'PART_SIZE': 8 * 2 ** 20,
+    'UPLOAD_WORKERS': 4,
+}
+
+# Раздача медиафайлов (blogicum.media). None — отдавать самим;
+# 'x-accel-redirect' — через nginx (internal location MEDIA_ACCEL_PREFIX
+# с alias на MEDIA_ROOT); 'x-sendfile' — через Apache/lighttpd.
+MEDIA_ACCEL = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60
+
+# Уменьшенные по запросу копии (blogicum.resize).
+BLOG_RESIZE_CACHE_DIR = BASE_DIR / 'resize_cache'
+BLOG_RESIZE_CACHE_MAX_BYTES = 512 * 2 ** 20
+BLOG_RESIZE_MAX_SIDE = 2048
+
+# Приём загрузок: файлы больше FILE_UPLOAD_MAX_MEMORY_SIZE пишутся
+# во временный файл, больше BLOG_UPLOAD_MAX_BYTES — отбрасываются.
+FILE_UPLOAD_HANDLERS = [
+    'blog.uploads.SizeLimitUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2_621_440
+BLOG_UPLOAD_MAX_BYTES = 20 * 2 ** 20
+BLOG_IMAGE_MAX_PIXELS = 40_000_000
+BLOG_IMAGE_MAX_SIDE = 4096
+
+# Файлы загрузок по частям (blog.views.ChunkedUploadView) до привязки
+# к публикации. Брошенные загрузки, которые не дописывались дольше
+# BLOG_CHUNKED_UPLOAD_MAX_AGE секунд, удаляет expire_chunked_uploads.
+BLOG_CHUNKED_UPLOAD_DIR = BASE_DIR / 'chunked_uploads'
+BLOG_CHUNKED_UPLOAD_MAX_AGE = 24 * 60 * 60
+
+# Ширины уменьшенных копий изображений публикаций (blog.images).
+BLOG_IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+BLOG_IMAGE_QUALITY = 85
+BLOG_WEBP_QUALITY = 80
+
+# Обработка загруженных изображений командой run_image_worker.
+# При False копии создаются прямо в запросе.
+BLOG_IMAGE_JOBS = True
+BLOG_IMAGE_WORKERS = 2
+BLOG_IMAGE_JOB_MAX_ATTEMPTS = 5
+BLOG_IMAGE_JOB_RETRY_DELAY = 5
+BLOG_IMAGE_JOB_TIMEOUT = 10 * 60
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
+
+def user_absolute_url(user):
+    # Код приложения импортируется при вызове: настройки читаются раньше,
+    # чем загружены приложения.
+    from blog.links import user_url
+
+    return user_url(user)
+
+
+# Модель пользователя чужая: ссылка на профиль задаётся здесь, а
+# User.get_absolute_url() Django добавляет сам.
+ABSOLUTE_URL_OVERRIDES = {
+    'auth.user': user_absolute_url,
+}
+
 LOGIN_REDIRECT_URL = '/'
 LOGIN_URL = 'login'
+
+# Выводить в списках публикаций лёгкие карточки (blog.cards) вместо
+# экземпляров Post. Выключено: page_obj тогда содержит не модели.
+BLOG_CARD_PROJECTION = False
+
+# Ленты, категории и профили отдаются потоком (StreamingHttpResponse):
+# шапка страницы уходит до того, как прочитаны публикации. Только для
+# WSGI: под ASGI Django 3.2 читает поток в цикле событий, где ORM запрещён,
+# поэтому там лента отдаётся целиком.
+BLOG_STREAMING_LISTINGS = False
+
+# Сжатие текстовых ответов (blogicum.compression): brotli, если установлен
+# пакет brotli, и gzip. Короткие ответы не сжимаются; сжатые байты
+# ответов без cookies хранятся в кэше по хешу тела.
+BLOG_COMPRESS_MIN_SIZE = 1024
+BLOG_COMPRESS_TYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml',
+)
+BLOG_COMPRESS_CACHE_TIMEOUT = 60 * 60
+
+# Минификация HTML-ответов (blogicum.minify); результат для ответов без
+# cookies кэшируется по хешу исходного тела.
+BLOG_MINIFY_HTML = True
+BLOG_MINIFY_CACHE_TIMEOUT = 60 * 60
+
+# Профилирование рендеринга шаблонов (blogicum.profiling): сотрудникам
+# замеры приходят в Server-Timing, журнал сводит команда template_profile.
+BLOG_TEMPLATE_PROFILING = False
+BLOG_TEMPLATE_PROFILE_LOG = BASE_DIR / 'template_profile.jsonl'
@@ -0,0 +1,105 @@
+"""Статика с хешем содержимого в именах и заранее сжатыми копиями.
+
+PrecompressedManifestStorage после обычной обработки collectstatic
+(хеши в именах, манифест) кладёт рядом с каждым текстовым файлом копии
+.gz и .br (если установлен brotli). Сжатие идёт параллельно, а уже
+сжатые файлы пропускаются: имя с хешем меняется вместе с содержимым,
+так что существующая копия всегда актуальна. serve_static отдаёт
+подходящую копию с Content-Encoding и Cache-Control: immutable для
+файлов из манифеста.
+"""
+import gzip
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage)
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+
+from .compression import brotli, choose_encoding
+from .media import _resolve, serve_file
+
+COMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.ico', '.txt', '.json', '.map')
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+
+def compress_max(data, encoding):
+    """Сжатие с максимальной степенью: выполняется один раз при сборке."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def static_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+class PrecompressedManifestStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = {}
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names[name] = hashed_name
+        if dry_run:
+            return
+        targets = [
+            (name, hashed_name) for name, hashed_name in hashed_names.items()
+            if hashed_name.endswith(COMPRESS_EXTENSIONS)]
+        with ThreadPoolExecutor(
+                settings.BLOG_STATIC_COMPRESS_WORKERS) as pool:
+            results = pool.map(
+                self.precompress, [hashed for _, hashed in targets])
+            for (name, _), written in zip(targets, results):
+                for compressed_name in written:
+                    yield name, compressed_name, True
+
+    def precompress(self, name):
+        """Пишет недостающие сжатые копии файла; возвращает их имена."""
+        path = Path(self.path(name))
+        data = None
+        written = []
+        for encoding in static_encodings():
+            target = path.with_name(path.name + SUFFIXES[encoding])
+            if target.exists():
+                continue
+            if data is None:
+                data = path.read_bytes()
+            compressed = compress_max(data, encoding)
+            if len(compressed) >= len(data):
+                continue
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(compressed)
+            os.replace(tmp_path, target)
+            written.append(name + SUFFIXES[encoding])
+        return written
+
+
+def is_manifest_name(path):
+    return path in getattr(staticfiles_storage, 'hashed_files', {}).values()
+
+
+@require_safe
+def serve_static(request, path):
+    path, fullpath = _resolve(path, settings.STATIC_ROOT)
+    variants = {
+        encoding: fullpath.with_name(fullpath.name + SUFFIXES[encoding])
+        for encoding in static_encodings()}
+    variants = {
+        encoding: variant for encoding, variant in variants.items()
+        if variant.is_file()}
+    encoding = choose_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', ''), tuple(variants))
+    response = serve_file(
+        request, variants.get(encoding, fullpath),
+        immutable=is_manifest_name(path))
+    if variants:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -1,7 +1,11 @@
-from django.urls import include, path
+import re
+
+from django.urls import include, path, re_path
 from django.contrib import admin
 from . import views
-from django.conf.urls.static import static
+from .media import serve_media
+from .resize import serve_resized
+from .staticfiles import serve_static
 from django.conf import settings
 
 
@@ -13,9 +17,15 @@ urlpatterns = [
     path("auth/registration/", views.registration, name="registration"),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL,
-                          document_root=settings.MEDIA_ROOT)
+urlpatterns += [
+    path('%sresize/<str:signature>/<int:width>x<int:height>/<path:path>'
+         % settings.MEDIA_URL.lstrip('/'),
+         serve_resized, name='resized_media'),
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+            serve_media, name='media'),
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.STATIC_URL.lstrip('/')),
+            serve_static, name='static'),
+]
 
 handler403 = 'pages.views.custom_403_csrf'
 handler404 = 'pages.views.custom_404'
@@ -1,15 +1,58 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user
 from django.shortcuts import render
 from django.views.generic import TemplateView
 
 
-class About(TemplateView):
+async def resolve_user(request):
+    """Загружает request.user заранее: сессия и пользователь читаются из БД.
+
+    ORM в цикле событий запрещён, поэтому запрос уходит в общий
+    thread-sensitive поток. Дальше шаблон берёт готового пользователя.
+    """
+    request.user = await sync_to_async(get_user, thread_sensitive=True)(
+        request)
+
+
+class AsyncTemplateView(TemplateView):
+    """TemplateView с асинхронным get() для ASGI.
+
+    Django 3.2 не поддерживает асинхронные представления-классы, поэтому
+    as_view() сам помечает представление корутиной, как это делает
+    Django 4.1. Страница рендерится здесь же, а не в потоке обработчика.
+    Под WSGI Django вызывает такое представление через async_to_sync.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view._is_coroutine = asyncio.coroutines._is_coroutine
+        return view
+
+    async def get(self, request, *args, **kwargs):
+        await resolve_user(request)
+        response = self.render_to_response(self.get_context_data(**kwargs))
+        return response.render()
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        return super().http_method_not_allowed(request, *args, **kwargs)
+
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
+
+
+class About(AsyncTemplateView):
     template_name = 'pages/about.html'
 
 
-class Rules(TemplateView):
+class Rules(AsyncTemplateView):
     template_name = 'pages/rules.html'
 
 
+# Обработчики ошибок Django 3.2 вызывает синхронно (response_for_exception),
+# и под ASGI они уже выполняются в потоке, поэтому остаются функциями.
 def custom_403_csrf(request, exception=None):
     return render(request, 'pages/403csrf.html', status=403)
 
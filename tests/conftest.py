@@ -3,6 +3,7 @@ import re
 import time
 from http import HTTPStatus
 from inspect import getsource
+from io import BytesIO
 from pathlib import Path
 from typing import (
     Iterable,
@@ -17,14 +18,17 @@ from typing import (
 )
 
 import pytest
+from bs4 import BeautifulSoup
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
 from mixer.backend.django import mixer as _mixer
+from PIL import Image
 
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
@@ -133,6 +137,58 @@ def another_user_client(another_user):
     return client
 
 
+@pytest.fixture
+def posts(mixer, user, published_category):
+    return mixer.cycle(N_PER_FIXTURE).blend(
+        "blog.Post", author=user, category=published_category,
+        location=None, is_published=True)
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.MEDIA_ROOT.mkdir()
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture
+def media_image(settings, media_root, tmp_path):
+    """Изображение 800x400 в MEDIA_ROOT и пустой кеш уменьшенных копий."""
+    settings.BLOG_RESIZE_CACHE_DIR = tmp_path / "cache"
+    (media_root / "posts").mkdir()
+    Image.new("RGB", (800, 400)).save(media_root / "posts/photo.jpg")
+    return "posts/photo.jpg"
+
+
+def make_image(
+        width=1000, height=500, image_format="JPEG", orientation=None,
+        mode="RGB", color=(73, 109, 137)) -> bytes:
+    """Байты изображения; orientation — значение тега EXIF Orientation."""
+    data = BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    Image.new(mode, (width, height), color).save(
+        data, image_format, exif=exif)
+    return data.getvalue()
+
+
+def make_upload(
+        width, height, image_format="PNG",
+        orientation=None) -> SimpleUploadedFile:
+    # Однобитный растр: даже огромные размеры дают маленький файл.
+    return SimpleUploadedFile(
+        f"big.{image_format.lower()}",
+        make_image(
+            width, height, image_format, orientation, mode="1", color=0))
+
+
+def page_text(html: str) -> str:
+    """Видимый текст страницы с нормализованными пробелами."""
+    soup = BeautifulSoup(html, "html.parser")
+    return " ".join(soup.get_text().split())
+
+
 def get_post_list_context_key(
         user_client, page_url, page_load_err_msg, key_missing_msg
 ):
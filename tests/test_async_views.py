@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import resolve
+
+pytestmark = [pytest.mark.django_db]
+
+
+@async_to_sync
+async def request(method, url, client=None):
+    return await getattr(client or AsyncClient(), method)(url)
+
+
+@pytest.mark.parametrize("url", ["/about/", "/rules/"])
+def test_static_pages_served_by_async_views(url):
+    assert asyncio.iscoroutinefunction(resolve(url).func)
+
+    response = request("get", url)
+    assert response.status_code == 200
+    assert "pages/" in response.templates[0].name
+    assert request("post", url).status_code == 405
+
+
+def test_async_page_sees_logged_in_user(user_client, user):
+    client = AsyncClient()
+    client.cookies = user_client.cookies
+    response = request("get", "/about/", client)
+    assert response.context["user"] == user
+    assert user.username in response.content.decode()
+
+
+def test_project_middleware_not_adapted(settings, caplog):
+    from django.core.handlers.asgi import ASGIHandler
+
+    settings.BLOG_TEMPLATE_PROFILING = True
+    # Django пишет об адаптации middleware только при DEBUG.
+    settings.DEBUG = True
+    with caplog.at_level("DEBUG", logger="django.request"):
+        ASGIHandler()
+    adapted = [
+        record.getMessage() for record in caplog.records
+        if "adapted" in record.getMessage()]
+    assert not [message for message in adapted if "blogicum." in message]
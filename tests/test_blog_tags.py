@@ -0,0 +1,25 @@
+import pytest
+from django.template import Engine
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_card_template_resolved_once_per_page(
+        settings, mixer, user, published_category, client, monkeypatch):
+    settings.TEMPLATES = [
+        t for t in settings.TEMPLATES if t.get("NAME") != "jinja2"]
+    mixer.cycle(5).blend(
+        "blog.Post", author=user, category=published_category,
+        location=None, is_published=True)
+    lookups = []
+    get_template = Engine.get_template
+
+    def counting_get_template(self, name):
+        lookups.append(name)
+        return get_template(self, name)
+
+    monkeypatch.setattr(Engine, "get_template", counting_get_template)
+    response = client.get("/")
+    assert response.content.count(b'class="card-title"') == 5
+    assert lookups.count("includes/post_card.html") == 1
+    assert "includes/category_link.html" not in lookups
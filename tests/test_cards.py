@@ -0,0 +1,20 @@
+import pytest
+from django.db.models import Count
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_cards_render_like_models(mixer, user, published_location):
+    from django.template.loader import render_to_string
+    from blog.cards import card_queryset
+    from blog.models import Post
+    from blog.templatetags.blog_tags import post_card
+
+    mixer.blend(
+        "blog.Post", author=user, location=published_location,
+        category__is_published=True)
+    qs = Post.objects.annotate(comment_count=Count("comments"))
+    post, card = qs.get(), card_queryset(qs).get()
+    assert render_to_string(
+        "includes/post_card.html", post_card(card)
+    ) == render_to_string("includes/post_card.html", post_card(post))
@@ -0,0 +1,132 @@
+import pytest
+from PIL import Image
+
+from conftest import make_image
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def upload_dirs(settings, media_root, tmp_path):
+    settings.BLOG_CHUNKED_UPLOAD_DIR = tmp_path / "chunks"
+    return tmp_path
+
+
+def start_upload(client, length, filename="photo.jpg"):
+    response = client.post(
+        "/uploads/", HTTP_UPLOAD_LENGTH=str(length),
+        HTTP_UPLOAD_FILENAME=filename)
+    assert response.status_code == 201
+    return response["Location"]
+
+
+def send_chunk(client, location, offset, chunk):
+    return client.generic(
+        "PATCH", location, chunk,
+        content_type="application/offset+octet-stream",
+        HTTP_UPLOAD_OFFSET=str(offset))
+
+
+def test_upload_resumes_from_reported_offset(upload_dirs, user_client):
+    data = make_image(200, 100)
+    location = start_upload(user_client, len(data))
+    half = len(data) // 2
+    assert send_chunk(user_client, location, 0, data[:half]).status_code == 204
+
+    response = user_client.head(location)
+    assert response["Upload-Offset"] == str(half)
+    assert send_chunk(user_client, location, 0, data).status_code == 409
+
+    response = send_chunk(user_client, location, half, data[half:])
+    assert response.status_code == 204
+    assert response["Upload-Offset"] == str(len(data))
+
+
+def test_upload_rejects_oversize_and_foreign_users(
+        settings, upload_dirs, user_client, another_user_client):
+    settings.BLOG_UPLOAD_MAX_BYTES = 10
+    response = user_client.post("/uploads/", HTTP_UPLOAD_LENGTH="11")
+    assert response.status_code == 413
+
+    location = start_upload(user_client, 5)
+    assert another_user_client.head(location).status_code == 404
+    response = send_chunk(user_client, location, 0, b"123456")
+    assert response.status_code == 413
+
+
+def test_completed_upload_attached_to_post(
+        upload_dirs, user_client, published_category):
+    from blog.models import ChunkedUpload, Post
+
+    data = make_image(200, 100)
+    location = start_upload(user_client, len(data))
+    send_chunk(user_client, location, 0, data)
+    upload = ChunkedUpload.objects.get()
+    user_client.post("/posts/create/", {
+        "title": "Докачанная картинка",
+        "text": "текст",
+        "pub_date": "2020-01-01 00:00",
+        "category": published_category.id,
+        "upload_token": str(upload.token),
+    })
+    post = Post.objects.get()
+    with Image.open(post.image) as image:
+        assert image.size == (200, 100)
+    assert post.image_jobs.exists()
+    assert not ChunkedUpload.objects.exists()
+    assert not (upload_dirs / "chunks" / f"{upload.token}.part").exists()
+
+
+def test_assembled_file_closed_after_downscale(
+        settings, upload_dirs, user_client, published_category, monkeypatch):
+    from blog.uploads import AssembledUpload
+
+    settings.BLOG_IMAGE_MAX_SIDE = 50
+    opened = []
+    original_init = AssembledUpload.__init__
+
+    def remember(self, upload):
+        original_init(self, upload)
+        opened.append(self)
+
+    monkeypatch.setattr(AssembledUpload, "__init__", remember)
+    data = make_image(200, 100)
+    location = start_upload(user_client, len(data))
+    send_chunk(user_client, location, 0, data)
+    token = location.rstrip("/").rsplit("/", 1)[-1]
+    user_client.post("/posts/create/", {
+        "title": "Уменьшенная картинка",
+        "text": "текст",
+        "pub_date": "2020-01-01 00:00",
+        "category": published_category.id,
+        "upload_token": token,
+    })
+    assert opened and all(upload.closed for upload in opened)
+
+
+def test_abandoned_uploads_expire(upload_dirs, user_client):
+    import os
+    import time
+
+    from django.core.management import call_command
+
+    from blog.models import ChunkedUpload
+
+    data = make_image(200, 100)
+    stale = start_upload(user_client, len(data))
+    send_chunk(user_client, stale, 0, data[:10])
+    active = start_upload(user_client, len(data))
+    send_chunk(user_client, active, 0, data[:10])
+    stray = upload_dirs / "chunks" / "lost.part"
+    stray.write_bytes(b"lost")
+
+    day_ago = time.time() - 2 * 24 * 60 * 60
+    stale_upload = ChunkedUpload.objects.get(token=stale.rstrip("/")[-36:])
+    for path in (stale_upload.path, stray):
+        os.utime(path, (day_ago, day_ago))
+    ChunkedUpload.objects.update(created_at="2000-01-01T00:00Z")
+
+    call_command("expire_chunked_uploads", max_age=24 * 60 * 60)
+    assert str(ChunkedUpload.objects.get().token) in active
+    assert not os.path.exists(stale_upload.path)
+    assert not stray.exists()
@@ -0,0 +1,65 @@
+import gzip
+import zlib
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_html_is_gzipped_and_cached(client, posts, monkeypatch):
+    from blogicum import compression
+
+    plain = client.get("/").content
+    response = client.get("/", HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert gzip.decompress(response.content) == plain
+
+    def fail(*args):
+        raise AssertionError("Ответ из кэша сжат повторно.")
+
+    monkeypatch.setattr(compression, "compress", fail)
+    assert client.get("/", HTTP_ACCEPT_ENCODING="gzip").content == (
+        response.content)
+
+
+def test_negotiation_honours_q_values_and_threshold(
+        settings, client, posts):
+    response = client.get("/", HTTP_ACCEPT_ENCODING="gzip;q=0, identity")
+    assert not response.has_header("Content-Encoding")
+    assert "Accept-Encoding" in response["Vary"]
+
+    settings.BLOG_COMPRESS_MIN_SIZE = 10 ** 9
+    response = client.get("/", HTTP_ACCEPT_ENCODING="gzip")
+    assert not response.has_header("Content-Encoding")
+
+
+def test_brotli_preferred_when_available(client, posts):
+    brotli = pytest.importorskip("brotli")
+    plain = client.get("/").content
+    response = client.get("/", HTTP_ACCEPT_ENCODING="gzip, br")
+    assert response["Content-Encoding"] == "br"
+    assert brotli.decompress(response.content) == plain
+
+
+def test_streaming_listing_is_compressed_per_chunk(settings, client, posts):
+    settings.BLOG_STREAMING_LISTINGS = True
+    plain = b"".join(client.get("/").streaming_content)
+    response = client.get("/", HTTP_ACCEPT_ENCODING="gzip")
+    chunks = list(response.streaming_content)
+    assert len(chunks) > 2
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Первая часть распаковывается сама, не дожидаясь конца потока.
+    assert b"</header>" in decompressor.decompress(chunks[0])
+    assert gzip.decompress(b"".join(chunks)) == plain
+
+
+def test_pages_with_cookies_skip_the_cache(user_client, posts, monkeypatch):
+    from blogicum import compression
+
+    def fail(*args):
+        raise AssertionError("Личная страница попала в кэш.")
+
+    monkeypatch.setattr(compression, "cached_compress", fail)
+    response = user_client.get("/", HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
@@ -0,0 +1,32 @@
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_excerpt_is_filled_on_save(mixer, user):
+    post = mixer.blend(
+        "blog.Post", author=user, text=" ".join(["слово"] * 20))
+    assert post.excerpt == " ".join(["слово"] * 10) + " …", (
+        "Убедитесь, что анонс публикации заполняется при сохранении."
+    )
+
+
+def test_backfill_excerpts(mixer, user):
+    from blog.models import Post
+
+    post = mixer.blend("blog.Post", author=user, text="короткий текст")
+    Post.objects.filter(id=post.id).update(excerpt="")
+    call_command("backfill_excerpts", batch_size=1)
+    post.refresh_from_db()
+    assert post.excerpt == "короткий текст"
+
+
+def test_partial_save_does_not_load_deferred_text(
+        mixer, user, django_assert_num_queries):
+    from blog.models import Post
+
+    post = mixer.blend("blog.Post", author=user, text="текст")
+    post = Post.objects.defer("text").get(id=post.id)
+    with django_assert_num_queries(1):
+        post.save(update_fields=["image_meta"])
@@ -0,0 +1,85 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_gc_media_removes_only_orphans(settings, tmp_path, mixer, user):
+    from blog.models import Post, StoredFile
+
+    settings.MEDIA_ROOT = tmp_path
+    storage = Post.image.field.storage
+    kept = storage.save("posts/kept.jpg", ContentFile(b"kept"))
+    variant = storage.save("posts/kept_320w.jpg", ContentFile(b"variant"))
+    orphan = storage.save("posts/orphan.jpg", ContentFile(b"orphan"))
+    mixer.blend(
+        "blog.Post", author=user, image=kept,
+        image_meta={"variants": {"320": variant}})
+
+    call_command("gc_media", grace=0, dry_run=True)
+    assert storage.exists(orphan)
+
+    call_command("gc_media", grace=0)
+    assert storage.exists(kept) and storage.exists(variant)
+    assert not storage.exists(orphan)
+    assert not StoredFile.objects.filter(name=orphan).exists()
+
+
+def test_gc_media_keeps_orphan_reuploaded_during_walk(
+        settings, tmp_path, mixer, user, monkeypatch):
+    import os
+    import time
+
+    from blog.management.commands.gc_media import Command
+    from blog.models import Post, StoredFile
+
+    settings.MEDIA_ROOT = tmp_path
+    storage = Post.image.field.storage
+    orphan = storage.save("posts/old.jpg", ContentFile(b"old bytes"))
+    week_ago = time.time() - 7 * 24 * 60 * 60
+    os.utime(storage.path(orphan), (week_ago, week_ago))
+    StoredFile.objects.update(updated_at="2000-01-01T00:00Z")
+
+    snapshot = Command.referenced_names
+
+    def reupload_after_snapshot():
+        referenced = snapshot()
+        # Та же картинка загружена, пока gc обходит каталог.
+        name = storage.save("posts/new.jpg", ContentFile(b"old bytes"))
+        assert name == orphan
+        assert os.path.getmtime(storage.path(name)) > week_ago
+        return referenced
+
+    monkeypatch.setattr(
+        Command, "referenced_names", staticmethod(reupload_after_snapshot))
+    call_command("gc_media", grace=60 * 60)
+    assert storage.exists(orphan)
+    assert StoredFile.objects.get(name=orphan).refcount == 2
+
+
+def test_gc_media_rechecks_references_before_deleting(
+        settings, tmp_path, mixer, user, monkeypatch):
+    import os
+    import time
+
+    from blog.management.commands.gc_media import Command
+    from blog.models import Post
+
+    settings.MEDIA_ROOT = tmp_path
+    storage = Post.image.field.storage
+    orphan = storage.save("posts/old.jpg", ContentFile(b"old bytes"))
+    week_ago = time.time() - 7 * 24 * 60 * 60
+    os.utime(storage.path(orphan), (week_ago, week_ago))
+
+    snapshot = Command.referenced_names
+
+    def attach_after_snapshot():
+        referenced = snapshot()
+        mixer.blend("blog.Post", author=user, image=orphan)
+        return referenced
+
+    monkeypatch.setattr(
+        Command, "referenced_names", staticmethod(attach_after_snapshot))
+    call_command("gc_media", grace=60 * 60)
+    assert storage.exists(orphan)
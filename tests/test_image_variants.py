@@ -0,0 +1,171 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from conftest import make_image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_variants_created_by_worker_after_upload(
+        media_root, user_client, published_category):
+    from blog.models import Post
+
+    response = user_client.post("/posts/create/", {
+        "title": "С картинкой",
+        "text": "текст",
+        "pub_date": "2020-01-01 00:00",
+        "category": published_category.id,
+        "image": SimpleUploadedFile("photo.jpg", make_image()),
+    })
+    assert response.status_code == 302
+    post = Post.objects.get()
+    assert post.image_meta == {"width": 1000, "height": 500}
+    assert post.image_jobs.get().status == "pending"
+    call_command("run_image_worker", "--once", "--workers", "0")
+    post.refresh_from_db()
+    assert post.image_jobs.get().status == "done"
+    assert set(post.image_meta["variants"]) == {"320", "640"}
+    with Image.open(media_root / post.image_meta["variants"]["320"]) as img:
+        assert img.size == (320, 160)
+    assert "320w" in post.image_srcset
+
+
+def test_generate_image_variants_command(media_root, mixer, user):
+    post = mixer.blend(
+        "blog.Post", author=user,
+        image=SimpleUploadedFile("photo.jpg", make_image(2000, 1000)))
+    call_command("generate_image_variants")
+    post.refresh_from_db()
+    assert set(post.image_meta["variants"]) == {"320", "640", "1280"}
+
+
+def test_webp_copies_are_idempotent(media_root, mixer, user):
+    from blog.images import generate_webp, process_post_image
+
+    post = mixer.blend(
+        "blog.Post", author=user,
+        image=SimpleUploadedFile("photo.png", make_image(700, 350, "PNG")))
+    process_post_image(post)
+    webp = post.image_meta["webp"]
+    assert set(webp) == {"original", "320", "640"}
+    assert post.image_meta["webp_bytes_saved"] > 0
+    assert generate_webp(post) == 0
+    assert post.image_meta["webp"] == webp
+    assert ".webp 640w" in post.image_webp_srcset
+
+
+def test_variants_follow_exif_orientation():
+    from blog.images import render_variants, render_webp
+
+    # Orientation 6: снимок повёрнут на 90°, показывать его 500x1000.
+    data = make_image(1000, 500, orientation=6)
+    variants = render_variants("photo.jpg", data)
+    with Image.open(BytesIO(variants["320"][1])) as image:
+        assert image.size == (320, 640)
+    webp, _ = render_webp({"original": ("photo.jpg", data)})
+    with Image.open(BytesIO(webp["original"][1])) as image:
+        assert image.size == (500, 1000)
+
+
+def test_dimensions_follow_exif_orientation(media_root, mixer, user):
+    from blog.images import image_dimensions, render_image
+
+    post = mixer.blend(
+        "blog.Post", author=user, image=SimpleUploadedFile(
+            "photo.jpg", make_image(1000, 500, orientation=6)))
+    storage = post.image.storage
+    assert image_dimensions(storage, post.image.name) == {
+        "width": 500, "height": 1000}
+    rendered = render_image(storage, post.image.name)
+    assert (rendered["width"], rendered["height"]) == (500, 1000)
+
+
+def test_webp_larger_than_source_is_dropped():
+    from blog.images import render_webp
+
+    tiny_gif = make_image(4, 4, "GIF")
+    webp, saved = render_webp({
+        "original": ("tiny.gif", tiny_gif),
+        "320": ("photo_320w.png", make_image(320, 160, "PNG")),
+    })
+    assert set(webp) == {"320"}
+    assert saved > 0
+
+
+def test_webp_source_needs_every_variant_width():
+    from blog.images import webp_srcset
+    from blog.models import Post
+
+    storage = Post.image.field.storage
+    meta = {
+        "variants": {"320": "posts/a_320w.png", "640": "posts/a_640w.png"},
+        "webp": {"original": "posts/a.webp", "320": "posts/a_320w.webp"},
+    }
+    assert webp_srcset(storage, meta) == ""
+    meta["webp"]["640"] = "posts/a_640w.webp"
+    assert webp_srcset(storage, meta) == (
+        "/media/posts/a_320w.webp 320w, /media/posts/a_640w.webp 640w")
+    assert webp_srcset(storage, {"webp": {"original": "posts/a.webp"}}) == (
+        "/media/posts/a.webp")
+
+
+def test_failed_image_job_is_retried(media_root, mixer, user):
+    from blog.jobs import enqueue_image_job
+    from blog.models import ImageJob
+
+    post = mixer.blend(
+        "blog.Post", author=user,
+        image=SimpleUploadedFile("broken.jpg", b"not an image"))
+    job = enqueue_image_job(post)
+    call_command("run_image_worker", "--once", "--workers", "0")
+    job.refresh_from_db()
+    assert job.status == ImageJob.PENDING
+    assert job.attempts == 1
+    assert job.last_error
+
+
+def crash_worker_process(name):
+    import os
+
+    os._exit(1)
+
+
+def test_crashed_worker_process_fails_job_and_pool_recovers(
+        media_root, mixer, user, monkeypatch):
+    from blog.jobs import enqueue_image_job
+    from blog.models import ImageJob
+
+    monkeypatch.setattr(
+        "blog.management.commands.run_image_worker.process_image_file",
+        crash_worker_process)
+    for name in ("first.jpg", "second.jpg"):
+        enqueue_image_job(mixer.blend(
+            "blog.Post", author=user,
+            image=SimpleUploadedFile(name, make_image())))
+    # Одно место в пуле: вторая задача уходит в пул, пересозданный
+    # после падения первой.
+    call_command("run_image_worker", "--once", "--workers", "1")
+    for job in ImageJob.objects.all():
+        assert job.status == ImageJob.PENDING
+        assert job.attempts == 1
+        assert "BrokenProcessPool" in job.last_error
+
+
+def test_card_has_dimensions_without_opening_file(
+        media_root, mixer, user, published_category, monkeypatch):
+    from django.template.loader import render_to_string
+    from blog.jobs import enqueue_image_job
+    from blog.templatetags.blog_tags import post_card
+
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        image=SimpleUploadedFile("photo.jpg", make_image(700, 350)))
+    enqueue_image_job(post)
+    monkeypatch.setattr(post.image.storage, "open", None)
+    html = render_to_string("includes/post_card.html", post_card(post))
+    assert 'width="700" height="350"' in html
+    assert 'loading="lazy"' in html
@@ -0,0 +1,61 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from conftest import page_text
+
+pytest.importorskip("jinja2")
+pytestmark = [pytest.mark.django_db]
+
+
+def page_summary(response):
+    html = response.content.decode("utf-8")
+    links = [a["href"] for a in BeautifulSoup(
+        html, "html.parser").find_all("a")]
+    return page_text(html), links
+
+
+@pytest.mark.parametrize("url", [
+    "/", "/posts/{post.id}/", "/category/{post.category.slug}/",
+    "/profile/{post.author.username}/",
+])
+def test_jinja2_pages_match_django_templates(
+        settings, user_client, post_with_published_location, comment, url):
+    url = url.format(post=post_with_published_location)
+    django_only = [t for t in settings.TEMPLATES if t.get("NAME") != "jinja2"]
+    settings.TEMPLATES = django_only
+    expected = page_summary(user_client.get(url))
+
+    settings.TEMPLATES = [settings.JINJA2_TEMPLATES, *django_only]
+    response = user_client.get(url)
+
+    assert response.templates[-1].origin.name.startswith(
+        str(settings.BASE_DIR / "jinja2"))
+    assert page_summary(response) == expected
+
+
+def test_template_rendered_sent_only_under_test_instrumentation(
+        settings, monkeypatch):
+    from django.template import engines
+    from django.template.base import Template
+    from django.test.signals import template_rendered
+
+    django_only = [t for t in settings.TEMPLATES if t.get("NAME") != "jinja2"]
+    settings.TEMPLATES = [settings.JINJA2_TEMPLATES, *django_only]
+    template = engines["jinja2"].get_template("includes/footer.html")
+    sent = []
+
+    def receiver(**kwargs):
+        sent.append(kwargs["template"])
+
+    template_rendered.connect(receiver)
+    try:
+        template.render({})
+        assert sent == [template]
+        # Вне тестов _render не подменён: сигнал не отправляется.
+        monkeypatch.setattr(
+            Template, "_render",
+            lambda self, context: self.nodelist.render(context))
+        template.render({})
+        assert sent == [template]
+    finally:
+        template_rendered.disconnect(receiver)
@@ -0,0 +1,45 @@
+import pytest
+from django.urls import reverse, set_script_prefix
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("viewname,value", [
+    ("blog:post_detail", 42),
+    ("blog:category_posts", "some-slug_1"),
+    ("blog:profile", "user.name+tag@example-1"),
+])
+def test_builder_matches_reverse(viewname, value):
+    from blog.links import url_builder
+
+    assert url_builder(viewname)(value) == reverse(viewname, args=[value])
+
+
+def test_builder_follows_script_prefix():
+    from blog.links import post_url
+
+    post_url(1)
+    set_script_prefix("/blog/")
+    try:
+        assert post_url(1) == "/blog/posts/1/"
+    finally:
+        set_script_prefix("/")
+
+
+def test_models_and_cards_have_absolute_urls(
+        mixer, user, published_category):
+    from django.db.models import Count
+    from blog.cards import card_queryset
+    from blog.models import Post
+
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, location=None)
+    card = card_queryset(
+        Post.objects.annotate(comment_count=Count("comments"))).get()
+    assert post.get_absolute_url() == card.get_absolute_url() == (
+        f"/posts/{post.id}/")
+    assert user.get_absolute_url() == card.author.get_absolute_url() == (
+        f"/profile/{user.username}/")
+    assert published_category.get_absolute_url() == (
+        card.category.get_absolute_url()) == (
+        f"/category/{published_category.slug}/")
@@ -0,0 +1,43 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def media_file(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    (tmp_path / "posts").mkdir()
+    (tmp_path / "posts" / "file.txt").write_bytes(b"0123456789")
+    return "/media/posts/file.txt"
+
+
+def test_full_and_conditional(client, media_file):
+    response = client.get(media_file)
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == b"0123456789"
+    assert response["Accept-Ranges"] == "bytes"
+    response = client.get(
+        media_file, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+
+def test_range_requests(client, media_file):
+    response = client.get(media_file, HTTP_RANGE="bytes=2-4")
+    assert response.status_code == 206
+    assert response["Content-Range"] == "bytes 2-4/10"
+    assert b"".join(response.streaming_content) == b"234"
+    response = client.get(media_file, HTTP_RANGE="bytes=-3")
+    assert b"".join(response.streaming_content) == b"789"
+    response = client.get(media_file, HTTP_RANGE="bytes=20-")
+    assert response.status_code == 416
+
+
+def test_path_traversal_is_rejected(client, media_file):
+    assert client.get("/media/../settings.py").status_code == 404
+
+
+def test_accel_redirect(settings, client, media_file):
+    settings.MEDIA_ACCEL = "x-accel-redirect"
+    response = client.get(media_file)
+    assert response["X-Accel-Redirect"] == "/protected-media/posts/file.txt"
+    assert response.content == b""
@@ -0,0 +1,56 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_whitespace_collapsed_and_comments_dropped():
+    from blogicum.minify import minify_html
+
+    html = (
+        "<div>\n    <p>Один   <b>два</b>  три<!-- заметка --> четыре</p>\n"
+        "    <!--[if IE]><p>IE</p><![endif]-->\n</div>\n")
+    assert minify_html(html) == (
+        "<div>\n<p>Один <b>два</b> три четыре</p>\n"
+        "<!--[if IE]><p>IE</p><![endif]-->\n</div>\n")
+
+
+def test_pre_textarea_and_attribute_values_preserved():
+    from blogicum.minify import minify_html
+
+    html = (
+        '<pre>  отступ\n    сохранён </pre>\n'
+        '<textarea name="text">  a\n\n  b</textarea>\n'
+        '<a   title="два   пробела"   href="/">ссылка</a>')
+    assert minify_html(html) == (
+        '<pre>  отступ\n    сохранён </pre>\n'
+        '<textarea name="text">  a\n\n  b</textarea>\n'
+        '<a title="два   пробела" href="/">ссылка</a>')
+
+
+def test_page_is_minified_once_per_body(
+        client, mixer, user, published_category, monkeypatch):
+    from blogicum import minify
+
+    mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        location=None, is_published=True)
+    response = client.get("/")
+    assert b"\n    " not in response.content
+    assert int(response["Content-Length"]) == len(response.content)
+
+    def fail(*args):
+        raise AssertionError("Страница из кэша минифицирована повторно.")
+
+    monkeypatch.setattr(minify, "minify_html", fail)
+    assert client.get("/").content == response.content
+
+
+def test_pages_with_cookies_skip_the_cache(user_client, monkeypatch):
+    from blogicum import minify
+
+    def fail(*args):
+        raise AssertionError("Личная страница попала в кэш.")
+
+    monkeypatch.setattr(minify, "cached_minify", fail)
+    response = user_client.get("/")
+    assert b"\n    " not in response.content
@@ -0,0 +1,43 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+CSS = (
+    '@charset "UTF-8";/*! banner */:root{--x:1}body{margin:0}'
+    '.btn,.unused-a{color:red}.btn:not(.unused-b){top:0}'
+    '.card .unused-c{left:0}table{border:0}'
+    '@media (min-width:576px){.container{width:540px}.unused-d{x:y}}'
+    '@media print{.btn{display:none}}'
+    '@keyframes spin{to{transform:rotate(1turn)}}'
+)
+
+
+def test_purge_keeps_used_selectors_only():
+    from blog.purgecss import critical, purge
+
+    purged = purge(CSS, {"btn", "card", "container"})
+    assert ".btn{color:red}" in purged
+    assert ".btn:not(.unused-b){top:0}" in purged
+    assert not any(
+        f"unused-{suffix}" in purged for suffix in ("a", "c", "d"))
+    assert "@media (min-width:576px){.container{width:540px}}" in purged
+    assert "@keyframes spin" in purged and "banner" not in purged
+
+    inline = critical(purged, {"container"}, {"html", "body"})
+    assert inline == (
+        ":root{--x:1}body{margin:0}"
+        "@media (min-width:576px){.container{width:540px}}")
+
+
+def test_purge_css_command_writes_both_sheets(tmp_path):
+    source = tmp_path / "bootstrap.min.css"
+    source.write_text(
+        CSS + ".navbar{a:b}.card-title{c:d}.form-control{e:f}")
+    call_command(
+        "purge_css", source=source, output=tmp_path / "purged.css",
+        critical_output=tmp_path / "critical.css", stdout=StringIO())
+    purged = (tmp_path / "purged.css").read_text()
+    # form-control добавляет полям django_bootstrap5, а не шаблоны.
+    assert ".form-control{e:f}" in purged
+    assert ".navbar{a:b}" in (tmp_path / "critical.css").read_text()
+    assert ".form-control" not in (tmp_path / "critical.css").read_text()
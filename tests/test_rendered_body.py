@@ -0,0 +1,59 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_text_html_is_escaped_and_cached(mixer, user):
+    from blog.rendering import body_cache, body_cache_key
+
+    post = mixer.blend(
+        "blog.Post", author=user, text="<b>первая</b>\nвторая")
+    expected = "&lt;b&gt;первая&lt;/b&gt;<br>вторая"
+    assert body_cache().get(body_cache_key(post.text)) == expected
+    assert post.text_html == expected
+
+
+def test_text_html_follows_edits(mixer, user):
+    from blog.models import Post
+
+    post = mixer.blend("blog.Post", author=user, text="старый")
+    post.text = "новый"
+    post.save()
+    assert Post.objects.get(id=post.id).text_html == "новый"
+
+
+def test_render_bodies_fills_shared_cache(mixer, user):
+    from blog.rendering import body_cache, body_cache_key
+
+    post = mixer.blend("blog.Post", author=user, text="а\nб")
+    body_cache().clear()
+    call_command("render_bodies")
+    assert body_cache().get(body_cache_key(post.text)) == "а<br>б"
+
+
+def test_render_bodies_refuses_process_local_cache(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        "bodies": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+    with pytest.raises(CommandError):
+        call_command("render_bodies")
+
+
+def test_migration_creates_body_cache_table(mixer, user):
+    import importlib
+    from types import SimpleNamespace
+
+    from django.db import connection
+
+    migration = importlib.import_module(
+        "blog.migrations.0010_body_cache_table")
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE blog_body_cache")
+    migration.create_body_cache_table(
+        None, SimpleNamespace(connection=connection))
+    assert "blog_body_cache" in connection.introspection.table_names()
+    post = mixer.blend("blog.Post", author=user, text="а\nб")
+    assert post.text_html == "а<br>б"
@@ -0,0 +1,79 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def read_size(response):
+    data = b"".join(response.streaming_content)
+    with Image.open(BytesIO(data)) as image:
+        return image.size
+
+
+def test_signed_url_resizes_and_caches(client, media_image, settings):
+    from blogicum.resize import resized_url
+
+    url = resized_url(media_image, 200)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert read_size(response) == (200, 100)
+    cached = list(settings.BLOG_RESIZE_CACHE_DIR.rglob("*.jpg"))
+    assert len(cached) == 1
+    assert read_size(client.get(url)) == (200, 100)
+
+
+def test_bad_signature_is_rejected(client, media_image):
+    from blogicum.resize import resized_url
+
+    url = resized_url(media_image, 200).replace("200x0", "300x0")
+    assert client.get(url).status_code == 404
+
+
+def test_cache_evicts_least_recent(client, media_image, settings):
+    import blogicum.resize
+    from blogicum.resize import resized_url
+
+    settings.BLOG_RESIZE_CACHE_MAX_BYTES = 1
+    blogicum.resize._cache_bytes = None
+    client.get(resized_url(media_image, 100))
+    client.get(resized_url(media_image, 120))
+    assert len(list(settings.BLOG_RESIZE_CACHE_DIR.rglob("*.jpg"))) <= 1
+
+
+def test_validators_survive_lru_touch(
+        client, media_image, settings, monkeypatch):
+    import os
+    import time
+
+    import blogicum.resize
+    from blogicum.resize import resized_url
+
+    url = resized_url(media_image, 200)
+    first = client.get(url)
+    b"".join(first.streaming_content)
+
+    utime = os.utime
+
+    def touch_later(path):
+        later = time.time() + 60
+        utime(path, (later, later))
+
+    # Отметка LRU при следующем обращении — минутой позже.
+    monkeypatch.setattr(blogicum.resize.os, "utime", touch_later)
+    response = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert response.status_code == 304
+    response = client.get(
+        url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert response.status_code == 304
+
+
+def test_resize_follows_exif_orientation(client, media_image, settings):
+    from blogicum.resize import resized_url
+
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new("RGB", (800, 400)).save(
+        settings.MEDIA_ROOT / media_image, exif=exif)
+    assert read_size(client.get(resized_url(media_image, 200))) == (200, 400)
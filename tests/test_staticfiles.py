@@ -0,0 +1,53 @@
+import gzip
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    settings.STATICFILES_FINDERS = [
+        "django.contrib.staticfiles.finders.FileSystemFinder"]
+    settings.STATICFILES_STORAGE = (
+        "blogicum.staticfiles.PrecompressedManifestStorage")
+    call_command("collectstatic", interactive=False, verbosity=0)
+    return tmp_path
+
+
+def hashed_css():
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    return staticfiles_storage.stored_name("css/bootstrap.min.css")
+
+
+def test_collectstatic_writes_compressed_siblings_once(
+        collected, monkeypatch):
+    from blogicum import staticfiles
+
+    name = hashed_css()
+    assert name != "css/bootstrap.min.css"
+    original = (collected / name).read_bytes()
+    assert gzip.decompress((collected / f"{name}.gz").read_bytes()) == (
+        original)
+
+    def fail(*args):
+        raise AssertionError("Неизменённый файл сжат повторно.")
+
+    monkeypatch.setattr(staticfiles, "compress_max", fail)
+    call_command("collectstatic", interactive=False, verbosity=0)
+
+
+def test_hashed_asset_served_precompressed_and_immutable(collected, client):
+    url = "/static/" + hashed_css()
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert response["Content-Type"] == "text/css"
+    assert "immutable" in response["Cache-Control"]
+    assert "Accept-Encoding" in response["Vary"]
+
+    plain = client.get(url)
+    assert not plain.has_header("Content-Encoding")
+    assert plain["ETag"] != response["ETag"]
+    assert "immutable" not in client.get(
+        "/static/css/bootstrap.min.css")["Cache-Control"]
@@ -0,0 +1,139 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def storage(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    from blog.models import Post
+    return Post.image.field.storage
+
+
+def test_identical_uploads_are_stored_once(storage, tmp_path):
+    from blog.models import StoredFile
+
+    first = storage.save("posts/a.jpg", ContentFile(b"same bytes"))
+    second = storage.save("posts/b.jpg", ContentFile(b"same bytes"))
+    assert first == second
+    assert StoredFile.objects.get(name=first).refcount == 2
+    storage.delete(first)
+    assert storage.exists(first)
+    storage.delete(first)
+    assert not storage.exists(first)
+    assert not StoredFile.objects.filter(name=first).exists()
+
+
+def test_dedupe_media_converts_legacy_files(storage, tmp_path, mixer, user):
+    from blog.models import Post
+
+    (tmp_path / "posts").mkdir()
+    for name in ("one.jpg", "two.jpg"):
+        (tmp_path / "posts" / name).write_bytes(b"legacy")
+    first = mixer.blend("blog.Post", author=user, image="posts/one.jpg")
+    second = mixer.blend("blog.Post", author=user, image="posts/two.jpg")
+    call_command("dedupe_media")
+    first, second = Post.objects.get(id=first.id), Post.objects.get(
+        id=second.id)
+    assert first.image.name == second.image.name
+    assert not (tmp_path / "posts" / "one.jpg").exists()
+    assert first.image.read() == b"legacy"
+
+
+@pytest.fixture
+def object_storage(tmp_path):
+    from blog.storage import ContentAddressedObjectStorage, LocalObjectClient
+
+    client = LocalObjectClient(tmp_path / "bucket")
+    return ContentAddressedObjectStorage(
+        client=client, base_url="https://cdn.example/", part_size=4)
+
+
+def test_object_storage_multipart_and_async_delete(object_storage):
+    from blog.models import StoredFile
+
+    name = object_storage.save("posts/a.bin", ContentFile(b"0123456789"))
+    assert object_storage.open(name).read() == b"0123456789"
+    assert StoredFile.objects.get(name=name).refcount == 1
+    future = object_storage.delete_unreferenced(name)
+    future.result()
+    assert not object_storage.exists(name)
+
+
+def test_object_storage_url_needs_no_requests(object_storage):
+    class NoNetwork:
+        def __getattr__(self, name):
+            raise AssertionError("url() не должен обращаться к хранилищу")
+
+    object_storage.client = NoNetwork()
+    assert object_storage.url("posts/ab/x.jpg") == (
+        "https://cdn.example/posts/ab/x.jpg")
+
+
+def test_multipart_upload_keeps_few_parts_in_flight(tmp_path):
+    import threading
+    import time
+
+    from blog.storage import LocalObjectClient, ObjectStorage
+
+    state = {"read": 0, "uploaded": 0, "max_ahead": 0}
+    lock = threading.Lock()
+
+    class SlowClient(LocalObjectClient):
+        def upload_part(self, *args):
+            time.sleep(0.01)
+            with lock:
+                state["uploaded"] += 1
+            return super().upload_part(*args)
+
+    class CountingFile(ContentFile):
+        def chunks(self, chunk_size=None):
+            for chunk in super().chunks(chunk_size):
+                with lock:
+                    state["read"] += 1
+                    state["max_ahead"] = max(
+                        state["max_ahead"],
+                        state["read"] - state["uploaded"])
+                yield chunk
+
+    storage = ObjectStorage(
+        client=SlowClient(tmp_path / "bucket"), part_size=4,
+        upload_workers=2)
+    storage.save("posts/big.bin", CountingFile(b"x" * 80))
+    assert storage.open("posts/big.bin").read() == b"x" * 80
+    assert state["max_ahead"] <= 3
+
+
+def test_post_releases_replaced_and_deleted_images(
+        storage, mixer, user, django_capture_on_commit_callbacks):
+    from blog.models import StoredFile
+
+    first = mixer.blend(
+        "blog.Post", author=user, image=ContentFile(b"old", "a.jpg"))
+    second = mixer.blend(
+        "blog.Post", author=user, image=ContentFile(b"old", "b.jpg"))
+    old = first.image.name
+    assert StoredFile.objects.get(name=old).refcount == 2
+    with django_capture_on_commit_callbacks(execute=True):
+        first.image = ContentFile(b"new", "c.jpg")
+        first.save()
+    assert StoredFile.objects.get(name=old).refcount == 1
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+        first.delete()
+    assert not StoredFile.objects.exists()
+    assert not storage.exists(old)
+
+
+def test_failed_store_releases_reference(storage, monkeypatch):
+    from blog.models import StoredFile
+
+    def fail(name, content):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(storage, "store_blob", fail)
+    with pytest.raises(OSError):
+        storage.save("posts/a.jpg", ContentFile(b"bytes"))
+    assert not StoredFile.objects.exists()
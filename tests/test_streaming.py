@@ -0,0 +1,37 @@
+import pytest
+
+from conftest import page_text
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("card_projection", [False, True])
+def test_streamed_listing_matches_rendered_page(
+        settings, mixer, user, published_category, client, card_projection):
+    settings.BLOG_CARD_PROJECTION = card_projection
+    mixer.cycle(12).blend(
+        "blog.Post", author=user, category=published_category,
+        location=None, is_published=True)
+    expected = client.get("/").content.decode()
+
+    settings.BLOG_STREAMING_LISTINGS = True
+    response = client.get("/")
+    assert response.streaming
+    chunks = [chunk.decode() for chunk in response.streaming_content]
+    assert "</header>" in chunks[0] and 'class="card-title"' not in chunks[0]
+    assert sum('class="card-title"' in chunk for chunk in chunks) == 10
+    assert page_text("".join(chunks)) == page_text(expected)
+
+
+def test_asgi_listing_is_buffered(settings, mixer, user, published_category):
+    from asgiref.sync import async_to_sync
+    from django.test import AsyncClient
+
+    mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        location=None, is_published=True)
+    settings.BLOG_STREAMING_LISTINGS = True
+    response = async_to_sync(AsyncClient().get)("/")
+    assert response.status_code == 200
+    assert not response.streaming
+    assert response.content.decode().count('class="card-title"') == 3
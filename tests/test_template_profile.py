@@ -0,0 +1,56 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.BLOG_TEMPLATE_PROFILING = True
+    settings.BLOG_TEMPLATE_PROFILE_LOG = tmp_path / "profile.jsonl"
+    # Вложенные шаблоны видны по отдельности только в DTL.
+    settings.TEMPLATES = [
+        t for t in settings.TEMPLATES if t.get("NAME") != "jinja2"]
+    return settings.BLOG_TEMPLATE_PROFILE_LOG
+
+
+def test_nested_templates_recorded_with_self_time(
+        profiling, user, user_client, posts):
+    user.is_staff = False
+    user.save()
+    response = user_client.get("/")
+    assert not response.has_header("Server-Timing")
+
+    record = json.loads(profiling.read_text().splitlines()[0])
+    assert record["view"] == "blog:index"
+    templates = record["templates"]
+    assert templates["includes/post_card.html"][0] == 3
+    count, cumulative, self_time = templates["blog/index.html"]
+    # Карточки входят в cumulative страницы, но не в её self.
+    assert cumulative >= self_time + templates["includes/post_card.html"][1]
+
+
+def test_server_timing_for_staff_and_report(
+        profiling, user, user_client, posts):
+    user.is_staff = True
+    user.save()
+    header = user_client.get("/")["Server-Timing"]
+    assert header.startswith('view;desc="blog:index";dur=')
+    assert 'desc="includes/post_card.html x3"' in header
+
+    user_client.get(f"/posts/{posts[0].id}/")
+    out = StringIO()
+    call_command("template_profile", log=profiling, clear=True, stdout=out)
+    report = out.getvalue()
+    assert "blog:post_detail" in report
+    assert "includes/post_card.html" in report
+    assert profiling.read_text() == ""
+
+
+def test_profiling_is_opt_in(settings, tmp_path, client, posts):
+    settings.BLOG_TEMPLATE_PROFILE_LOG = tmp_path / "profile.jsonl"
+    assert not client.get("/").has_header("Server-Timing")
+    assert not settings.BLOG_TEMPLATE_PROFILE_LOG.exists()
@@ -0,0 +1,30 @@
+import copy
+
+import pytest
+from django.template.loader import get_template
+from django.template.loaders.filesystem import Loader
+
+
+@pytest.fixture
+def cached_templates(settings):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[-1]["OPTIONS"]["loaders"] = [
+        ("django.template.loaders.cached.Loader",
+         settings.BLOG_TEMPLATE_LOADERS),
+    ]
+    settings.TEMPLATES = templates
+
+
+def test_warmup_compiles_every_project_template(cached_templates, monkeypatch):
+    from blog.warmup import warm_templates
+
+    warmed = warm_templates()
+    assert "base.html" in warmed
+    assert "includes/post_card.html" in warmed
+
+    def read_from_disk(*args, **kwargs):
+        raise AssertionError("Прогретый шаблон снова читается с диска.")
+
+    monkeypatch.setattr(Loader, "get_contents", read_from_disk)
+    get_template("blog/index.html")
+    get_template("includes/post_card.html")
@@ -0,0 +1,60 @@
+import pytest
+from PIL import Image
+
+from conftest import make_upload
+
+pytestmark = [pytest.mark.django_db]
+
+
+def create_post(client, category, image):
+    return client.post("/posts/create/", {
+        "title": "Большая картинка",
+        "text": "текст",
+        "pub_date": "2020-01-01 00:00",
+        "category": category.id,
+        "image": image,
+    })
+
+
+def test_oversized_file_is_rejected_while_streaming(
+        settings, media_root, user_client, published_category):
+    from blog.models import Post
+
+    settings.BLOG_UPLOAD_MAX_BYTES = 10
+    response = create_post(
+        user_client, published_category, make_upload(400, 400))
+    assert response.status_code == 200
+    assert "image" in response.context["form"].errors
+    assert not Post.objects.exists()
+
+
+def test_too_many_pixels_rejected_by_header(
+        settings, media_root, user_client, published_category):
+    settings.BLOG_IMAGE_MAX_PIXELS = 10_000
+    response = create_post(
+        user_client, published_category, make_upload(20_000, 20_000))
+    errors = response.context["form"].errors["image"]
+    assert "мегапикселей" in errors[0]
+
+
+def test_large_original_is_downscaled_on_ingest(
+        settings, media_root, user_client, published_category):
+    from blog.models import Post
+
+    settings.BLOG_IMAGE_MAX_SIDE = 100
+    create_post(
+        user_client, published_category, make_upload(300, 150, "JPEG"))
+    with Image.open(Post.objects.get().image) as image:
+        assert image.size == (100, 50)
+
+
+def test_downscaled_original_follows_exif_orientation(
+        settings, media_root, user_client, published_category):
+    from blog.models import Post
+
+    settings.BLOG_IMAGE_MAX_SIDE = 100
+    create_post(
+        user_client, published_category,
+        make_upload(300, 150, "JPEG", orientation=6))
+    with Image.open(Post.objects.get().image) as image:
+        assert image.size == (50, 100)